@@ -0,0 +1,107 @@
+"""Latence d'un endpoint sans rapport pendant une rafale de connexions.
+
+Compare la vérification bcrypt exécutée directement dans le handler (comportement historique) avec la vérification
+déléguée au pool de `immo.users.passwords`. Pendant que `--logins` connexions concurrentes sont traitées, un client
+interroge en boucle un endpoint trivial et on relève les percentiles de sa latence.
+
+Usage : python -m benchmarks.bench_password_hashing [--logins 40] [--workers 4] [--executor thread]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from typing import Dict, List
+
+import httpx
+
+from fastapi import FastAPI
+from immo.users.passwords import PasswordHasher, pwd_context
+
+
+PASSWORD = "Benchmark@2025"
+PROBE_INTERVAL = 0.005  # Secondes entre deux appels à /ping
+
+
+def build_app(hasher: PasswordHasher, password_hash: str) -> FastAPI:
+    """Application minimale : deux variantes de connexion et un endpoint témoin."""
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping() -> Dict[str, bool]:
+        return {"ok": True}
+
+    @app.post("/login/blocking")
+    async def login_blocking() -> Dict[str, bool]:
+        return {"ok": pwd_context.verify(PASSWORD, password_hash)}
+
+    @app.post("/login/pooled")
+    async def login_pooled() -> Dict[str, bool]:
+        return {"ok": await hasher.verify(PASSWORD, password_hash)}
+
+    return app
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentile `q` (entre 0 et 100) d'une liste de mesures."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_scenario(app: FastAPI, login_path: str, logins: int) -> Dict[str, float]:
+    """Lancer les connexions concurrentes et mesurer la latence de /ping pendant ce temps."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies: List[float] = []
+        done = asyncio.Event()
+
+        async def probe() -> None:
+            # Le retard sur le réveil programmé compte dans la latence : c'est lui que subit un client réel
+            while not done.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(PROBE_INTERVAL)
+                await client.get("/ping")
+                latencies.append((time.perf_counter() - started - PROBE_INTERVAL) * 1000)
+
+        started = time.perf_counter()
+        probe_task = asyncio.create_task(probe())
+        await asyncio.gather(*(client.post(login_path) for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {
+        "probes": len(latencies),
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies),
+        "logins_per_s": logins / elapsed,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40, help="Nombre de connexions concurrentes")
+    parser.add_argument("--workers", type=int, default=4, help="Taille du pool de hachage")
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(executor=args.executor, max_workers=args.workers, max_queue=0)
+    app = build_app(hasher, pwd_context.hash(PASSWORD))
+
+    print(f"{args.logins} connexions concurrentes, pool {args.executor} de {args.workers} workers")
+    for label, path in (("bloquant", "/login/blocking"), ("pool", "/login/pooled")):
+        result = await run_scenario(app, path, args.logins)
+        print(
+            f"{label:>9}: /ping p50={result['p50_ms']:.1f} ms p99={result['p99_ms']:.1f} ms "
+            f"max={result['max_ms']:.1f} ms ({result['probes']} mesures), {result['logins_per_s']:.1f} connexions/s"
+        )
+
+    print(f"Statistiques du pool: {hasher.stats()}")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
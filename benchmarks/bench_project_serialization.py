@@ -0,0 +1,163 @@
+"""Coût de sérialisation d'une liste de `ProjectWithDetails` (100 projets de 20 étapes par défaut).
+
+Compare, pour la même liste d'objets :
+
+- la réponse complète, validée par FastAPI avec le `response_model` puis encodée par Pydantic (chemin actuel) ;
+- la même réponse avec `default_response_class=ORJSONResponse` (si `orjson` est installé) : FastAPI repasse alors
+  par `jsonable_encoder` avant d'appeler orjson ;
+- la réponse partielle (`?expand=steps,...`) encodée avant (`JSONResponse(jsonable_encoder(...))`) et après
+  (`Fieldset.response`, `TypeAdapter.dump_json`).
+
+Les objets sont construits en mémoire et imitent les modèles SQLAlchemy : la base de données n'intervient pas.
+
+Usage : python -m benchmarks.bench_project_serialization [--requests 200] [--projects 100] [--steps 20]
+"""
+
+import argparse
+import asyncio
+import time
+import warnings
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import httpx
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import FastAPIDeprecationWarning
+from fastapi.responses import JSONResponse
+from immo.fieldsets import Selection
+from immo.projects.router import PROJECT_FIELDSET
+from immo.projects.schemas import ProjectInDB, ProjectWithDetails
+
+
+# `ORJSONResponse` est déprécié par FastAPI : il n'est mesuré ici que pour comparaison
+warnings.simplefilter("ignore", FastAPIDeprecationWarning)
+
+try:
+    import orjson  # noqa: F401
+
+    from fastapi.responses import ORJSONResponse
+except ImportError:
+    ORJSONResponse = None
+
+
+def build_projects(projects: int, steps: int) -> List[SimpleNamespace]:
+    """Projets synthétiques, avec leurs relations chargées."""
+    created_at = datetime(2024, 1, 1)
+    status_project = SimpleNamespace(id=1, name="En cours", description="Projet en cours")
+    city = SimpleNamespace(id=1, name="Dakar", country_id=1, created_by=1)
+    currency = SimpleNamespace(id=1, name="Franc CFA", code="XOF", created_by=1)
+
+    result = []
+    for index in range(1, projects + 1):
+        project_steps = [
+            SimpleNamespace(
+                id=index * steps + number,
+                title=f"Étape {number}",
+                description="Description de l'étape",
+                number=number,
+                budget=1000,
+                progress=number * 5 % 101,
+                begin_at=created_at + timedelta(days=number),
+                end_at=created_at + timedelta(days=number + 7),
+                project_id=index,
+                creator_id=1,
+                created_at=created_at,
+            )
+            for number in range(1, steps + 1)
+        ]
+        result.append(
+            SimpleNamespace(
+                id=index,
+                title=f"Projet {index}",
+                description="Description du projet",
+                budget=steps * 2000,
+                begin_at=created_at,
+                end_at=created_at + timedelta(days=365),
+                user_id=1,
+                status_project_id=1,
+                city_id=1,
+                currency_id=1,
+                created_at=created_at,
+                progress=50,
+                total_steps=steps,
+                completed_steps=steps // 2,
+                allocated_budget=steps * 1000,
+                unallocated_budget=steps * 1000,
+                status_project=status_project,
+                city=city,
+                currency=currency,
+                steps=project_steps,
+            )
+        )
+    return result
+
+
+def build_app(projects: List[SimpleNamespace], default_response_class: Optional[type] = None) -> FastAPI:
+    """Application minimale : réponse complète et réponses partielles."""
+    app = FastAPI(default_response_class=default_response_class) if default_response_class else FastAPI()
+    # Tous les champs simples et toutes les relations, comme `?expand=status_project,city,currency,steps` (les champs
+    # sont ceux du schéma : `PROJECT_FIELDSET.fields` demanderait la configuration de tous les modèles SQLAlchemy)
+    selection = Selection(fields=tuple(ProjectInDB.model_fields), expand=tuple(PROJECT_FIELDSET.expandable))
+
+    @app.get("/projects", response_model=List[ProjectWithDetails])
+    async def full():
+        return projects
+
+    @app.get("/projects/partial/before")
+    async def partial_before():
+        content = [PROJECT_FIELDSET.serialize(project, selection) for project in projects]
+        return JSONResponse(content=jsonable_encoder(content))
+
+    @app.get("/projects/partial/after")
+    async def partial_after():
+        return PROJECT_FIELDSET.response(projects, selection)
+
+    return app
+
+
+async def run_scenario(app: FastAPI, path: str, requests: int) -> Dict[str, float]:
+    """Enchaîner les requêtes et mesurer la durée moyenne et la taille de la réponse."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Première requête hors mesure (construction des sérialiseurs, échauffement)
+        response = await client.get(path)
+        response.raise_for_status()
+
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get(path)
+        elapsed = time.perf_counter() - started
+
+    return {"ms_per_request": elapsed / requests * 1000, "bytes": len(response.content)}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Nombre de requêtes par scénario")
+    parser.add_argument("--projects", type=int, default=100, help="Nombre de projets")
+    parser.add_argument("--steps", type=int, default=20, help="Nombre d'étapes par projet")
+    args = parser.parse_args()
+
+    projects = build_projects(args.projects, args.steps)
+    app = build_app(projects)
+
+    print(f"{args.requests} requêtes séquentielles, {args.projects} projets de {args.steps} étapes")
+    scenarios = [
+        ("complète (défaut)", app, "/projects"),
+        ("partielle avant", app, "/projects/partial/before"),
+        ("partielle après", app, "/projects/partial/after"),
+    ]
+    if ORJSONResponse is not None:
+        scenarios.insert(1, ("complète (orjson)", build_app(projects, ORJSONResponse), "/projects"))
+
+    for label, scenario_app, path in scenarios:
+        result = await run_scenario(scenario_app, path, args.requests)
+        print(f"{label:>18}: {result['ms_per_request']:.2f} ms/requête, {result['bytes']:.0f} octets")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+"""Débit de `GET /properties` : réponse validée à chaque appel contre réponse pré-rendue.
+
+Compare le chemin historique (le handler renvoie les objets, FastAPI les valide avec `UtilsProperties` puis encode
+le JSON à chaque requête) avec le corps rendu et compressé une seule fois par version des données de référence
+(`ReferenceSnapshot.rendered`). Les données sont générées en mémoire : la base de données n'intervient pas.
+
+Usage : python -m benchmarks.bench_reference_responses [--requests 2000] [--countries 50]
+"""
+
+import argparse
+import asyncio
+import time
+
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Dict
+
+import httpx
+
+from fastapi import Depends, FastAPI, Request
+from immo.compression import brotli
+from immo.utils.references import ReferenceSnapshot
+from immo.utils.router import render
+from immo.utils.schemas import CountryInDB, CurrencyInDB, StatusProjectInDB, UtilsProperties
+
+
+def build_snapshot(countries: int) -> ReferenceSnapshot:
+    """Photographie synthétique des données de référence."""
+    country_index = {
+        index: CountryInDB(id=index, name=f"Pays {index}", code=f"{index:02d}"[-2:], created_by=1)
+        for index in range(1, countries + 1)
+    }
+    currency_index = {
+        index: CurrencyInDB(id=index, name=f"Devise {index}", code=f"C{index:02d}", created_by=1)
+        for index in range(1, 21)
+    }
+    status_index = {
+        index: StatusProjectInDB(id=index, name=f"Statut {index}", description="Statut de projet")
+        for index in range(1, 4)
+    }
+
+    return ReferenceSnapshot(
+        version=1,
+        etag='"bench"',
+        modified_at=datetime.now(timezone.utc),
+        countries=MappingProxyType(country_index),
+        cities=MappingProxyType({}),
+        currencies=MappingProxyType(currency_index),
+        status_projects=MappingProxyType(status_index),
+        countries_by_code=MappingProxyType({country.code: country for country in country_index.values()}),
+        currencies_by_code=MappingProxyType({currency.code: currency for currency in currency_index.values()}),
+        cities_by_country=MappingProxyType({}),
+    )
+
+
+def build_app(snapshot: ReferenceSnapshot) -> FastAPI:
+    """Application minimale : les deux variantes de `GET /properties`."""
+    app = FastAPI()
+
+    def get_snapshot() -> ReferenceSnapshot:
+        return snapshot
+
+    @app.get("/properties/validated", response_model=UtilsProperties)
+    async def validated(references: ReferenceSnapshot = Depends(get_snapshot)):
+        return {
+            "countries": list(references.countries.values()),
+            "currencies": list(references.currencies.values()),
+            "status_projects": list(references.status_projects.values()),
+        }
+
+    @app.get("/properties/prerendered", response_model=UtilsProperties)
+    async def prerendered(request: Request, references: ReferenceSnapshot = Depends(get_snapshot)):
+        return render(
+            request,
+            references,
+            "properties",
+            lambda: UtilsProperties(
+                countries=list(references.countries.values()),
+                currencies=list(references.currencies.values()),
+                status_projects=list(references.status_projects.values()),
+            )
+            .model_dump_json()
+            .encode(),
+        )
+
+    return app
+
+
+async def run_scenario(app: FastAPI, path: str, requests: int, accept_encoding: str) -> Dict[str, float]:
+    """Enchaîner les requêtes et mesurer le débit et la taille transférée."""
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Accept-Encoding": accept_encoding}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        # Première requête hors mesure (rendu initial, échauffement)
+        response = await client.get(path)
+
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get(path)
+        elapsed = time.perf_counter() - started
+
+    return {"requests_per_s": requests / elapsed, "bytes": response.num_bytes_downloaded}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="Nombre de requêtes par scénario")
+    parser.add_argument("--countries", type=int, default=50, help="Nombre de pays")
+    args = parser.parse_args()
+
+    app = build_app(build_snapshot(args.countries))
+
+    print(f"{args.requests} requêtes séquentielles, {args.countries} pays")
+    scenarios = [
+        ("validée", "/properties/validated", "identity"),
+        ("pré-rendue", "/properties/prerendered", "identity"),
+        ("pré-rendue gzip", "/properties/prerendered", "gzip"),
+    ]
+    if brotli is not None:
+        scenarios.append(("pré-rendue br", "/properties/prerendered", "br"))
+
+    for label, path, accept_encoding in scenarios:
+        result = await run_scenario(app, path, args.requests, accept_encoding)
+        print(f"{label:>16}: {result['requests_per_s']:.0f} requêtes/s, {result['bytes']:.0f} octets transférés")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,323 @@
+"""Compression des réponses : gzip et, si le module optionnel `brotli` est installé, brotli.
+
+Trois mécanismes, du plus économe au plus général :
+
+- une réponse dont le contenu ne change qu'avec une version de données (données de référence, ...) est compressée
+  une seule fois (`PrecompressedBody`) : chaque requête reçoit ensuite l'encodage qu'elle accepte (`Accept-Encoding`)
+  sans autre travail qu'une copie mémoire ;
+- les fichiers statiques textuels (CSS, JS, SVG) sont compressés à la construction (`precompress_static`, commande
+  `precompress-static`) et servis tels quels par `PrecompressedStaticFiles` ;
+- les autres réponses (API, pages HTML) sont compressées à la volée par `CompressionMiddleware`, au-delà d'une taille
+  minimale, avec un niveau réglable : un niveau modéré compresse presque aussi bien pour bien moins de temps CPU.
+
+Une réponse qui porte déjà un `Content-Encoding` n'est jamais recompressée.
+"""
+
+import gzip
+import mimetypes
+import os
+import stat
+import zlib
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Container, Dict, List, Optional, Sequence, Tuple, Union
+
+from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépendance optionnelle (extra `compression`)
+    brotli = None
+
+
+# Taille (octets) en dessous de laquelle la compression ne fait pas gagner de temps de transfert
+MINIMUM_COMPRESSED_SIZE = 500
+
+# Encodages proposés, par ordre de préférence à qualité égale
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Suffixe des variantes pré-compressées d'un fichier statique
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Fichiers statiques pré-compressés (les images PNG/JPEG et les polices woff2 sont déjà compressées)
+PRECOMPRESSED_EXTENSIONS = (".css", ".js", ".svg", ".html", ".json", ".txt")
+
+# Types de contenu compressés à la volée
+COMPRESSIBLE_MEDIA_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/problem+json",
+    "image/svg+xml",
+)
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Encodages acceptés par le client avec leur qualité (`Accept-Encoding: br;q=1.0, gzip;q=0.8`)."""
+    encodings: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.strip().partition(";")
+        quality = 1.0
+        parameter = parameters.strip()
+        if parameter.startswith("q="):
+            try:
+                quality = float(parameter[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+
+def choose_encoding(accept_encoding: str, available: Container[str]) -> Optional[str]:
+    """Meilleur encodage disponible accepté par le client (None : réponse non compressée)."""
+    accepted = accepted_encodings(accept_encoding)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if encoding in available and quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+@dataclass(frozen=True)
+class PrecompressedBody:
+    """Corps de réponse rendu une fois, avec ses variantes compressées."""
+
+    content: bytes
+    encoded: Dict[str, bytes]
+    media_type: str = "application/json"
+
+    @classmethod
+    def of(cls, content: bytes, media_type: str = "application/json") -> "PrecompressedBody":
+        """Compresser un corps de réponse dans tous les encodages disponibles (s'il est assez volumineux)."""
+        encoded: Dict[str, bytes] = {}
+        if len(content) >= MINIMUM_COMPRESSED_SIZE:
+            # mtime fixe : le résultat ne dépend que du contenu
+            encoded["gzip"] = gzip.compress(content, compresslevel=9, mtime=0)
+            if brotli is not None:
+                encoded["br"] = brotli.compress(content, quality=11)
+        return cls(content=content, encoded=encoded, media_type=media_type)
+
+    def response(self, request: Request, headers: Optional[Dict[str, str]] = None) -> Response:
+        """Réponse dans le meilleur encodage accepté par le client."""
+        headers = dict(headers or {})
+        content = self.content
+
+        if self.encoded:
+            headers["Vary"] = "Accept-Encoding"
+            encoding = choose_encoding(request.headers.get("accept-encoding", ""), self.encoded)
+            if encoding is not None:
+                headers["Content-Encoding"] = encoding
+                content = self.encoded[encoding]
+                # Une représentation compressée n'est pas identique octet pour octet : son `ETag` devient faible
+                if "ETag" in headers and not headers["ETag"].startswith("W/"):
+                    headers["ETag"] = "W/" + headers["ETag"]
+
+        return Response(content=content, media_type=self.media_type, headers=headers)
+
+
+def is_compressible(media_type: str) -> bool:
+    """Vérifier si un type de contenu gagne à être compressé (les flux d'événements ne sont jamais mis en tampon)."""
+    media_type = media_type.split(";")[0].strip().lower()
+    return media_type != "text/event-stream" and media_type.startswith(COMPRESSIBLE_MEDIA_TYPES)
+
+
+class CompressionMiddleware:
+    """Middleware ASGI compressant les réponses en gzip ou en brotli selon l'en-tête `Accept-Encoding`.
+
+    Ne sont pas compressées : les réponses plus petites que `minimum_size` (corps transmis en une fois), les réponses
+    déjà encodées (`Content-Encoding`), partielles (`Content-Range`), sans corps (204, 304) ou d'un type déjà compressé
+    (images, ...). L'`ETag` d'une réponse compressée devient faible, comme pour `PrecompressedBody`.
+    """
+
+    def __init__(
+        self, app: ASGIApp, minimum_size: int = MINIMUM_COMPRESSED_SIZE, gzip_level: int = 6, brotli_quality: int = 4
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), ENCODINGS)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compress: Optional[Tuple[Callable[[bytes], bytes], Callable[[], bytes]]] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compress, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                # Attendre le premier morceau du corps pour connaître sa taille
+                start = message
+                return
+
+            assert start is not None
+            if message["type"] != "http.response.body":
+                # Extension ASGI (`pathsend`, ...) : réponse transmise sans compression
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compress is None:
+                headers = MutableHeaders(raw=start["headers"])
+                if not self._should_compress(start["status"], headers) or (
+                    not more_body and len(body) < self.minimum_size
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                compress = self._compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag is not None and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+
+                if not more_body:
+                    # Corps complet : compressé en une fois, avec sa longueur
+                    content = compress[0](body) + compress[1]()
+                    headers["Content-Length"] = str(len(content))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": content})
+                    return
+
+                # Corps en flux : longueur inconnue à l'avance
+                del headers["Content-Length"]
+                await send(start)
+
+            chunk = compress[0](body)
+            if not more_body:
+                chunk += compress[1]()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _should_compress(status_code: int, headers: Headers) -> bool:
+        """Vérifier si une réponse peut être compressée d'après son statut et ses en-têtes."""
+        return (
+            status_code >= 200
+            and status_code not in (204, 304)
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+            and is_compressible(headers.get("content-type", ""))
+        )
+
+    def _compressor(self, encoding: str) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+        """Fonctions de compression incrémentale (morceau, fin du flux) pour un encodage."""
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.finish
+        # wbits=31 : en-tête et somme de contrôle gzip
+        gzip_compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        return gzip_compressor.compress, gzip_compressor.flush
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """Fichiers statiques servis dans leur variante pré-compressée (`.br`, `.gz`) si le client l'accepte.
+
+    Une variante plus ancienne que son fichier source (construction oubliée après une modification) est ignorée.
+    """
+
+    def file_response(
+        self,
+        full_path: Union[str, "os.PathLike[str]"],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        variants = self._variants(str(full_path), stat_result)
+        if not variants:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        headers = {"Vary": "Accept-Encoding"}
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""), variants)
+        if encoding is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+        else:
+            variant_path, variant_stat = variants[encoding]
+            headers["Content-Encoding"] = encoding
+            response = FileResponse(
+                variant_path,
+                status_code=status_code,
+                stat_result=variant_stat,
+                headers=headers,
+                media_type=mimetypes.guess_type(str(full_path))[0] or "text/plain",
+            )
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def _variants(full_path: str, stat_result: os.stat_result) -> Dict[str, Tuple[str, os.stat_result]]:
+        """Variantes pré-compressées à jour d'un fichier statique."""
+        variants: Dict[str, Tuple[str, os.stat_result]] = {}
+        if not full_path.endswith(PRECOMPRESSED_EXTENSIONS):
+            return variants
+        for encoding in ENCODINGS:
+            variant_path = full_path + SUFFIXES[encoding]
+            try:
+                variant_stat = os.stat(variant_path)
+            except OSError:
+                continue
+            if stat.S_ISREG(variant_stat.st_mode) and variant_stat.st_mtime >= stat_result.st_mtime:
+                variants[encoding] = (variant_path, variant_stat)
+        return variants
+
+
+def precompress_static(
+    directory: Path, extensions: Sequence[str] = PRECOMPRESSED_EXTENSIONS
+) -> List[Tuple[Path, int, Dict[str, int]]]:
+    """Écrire les variantes `.br`/`.gz` des fichiers statiques textuels de `directory`.
+
+    Les fichiers sont compressés au niveau maximal, une seule fois. Une variante qui ne serait pas plus petite que son
+    fichier source n'est pas écrite (et une variante existante est alors supprimée). Renvoie, pour chaque fichier,
+    sa taille et celle de ses variantes.
+    """
+    results = []
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.suffix not in extensions:
+            continue
+
+        content = path.read_bytes()
+        body = PrecompressedBody.of(content)
+        sizes: Dict[str, int] = {}
+        for encoding in ENCODINGS:
+            variant_path = path.with_name(path.name + SUFFIXES[encoding])
+            encoded = body.encoded.get(encoding)
+            if encoded is not None and len(encoded) < len(content):
+                variant_path.write_bytes(encoded)
+                sizes[encoding] = len(encoded)
+            elif variant_path.exists():
+                variant_path.unlink()
+        results.append((path, len(content), sizes))
+    return results
@@ -0,0 +1,278 @@
+"""Métriques de la base de données.
+
+Le pool de connexions est instrumenté à deux niveaux : la classe `InstrumentedAsyncAdaptedQueuePool` mesure le temps
+d'attente d'une connexion libre (y compris les dépassements de `pool_timeout`), et les événements du pool comptent
+les connexions ouvertes, empruntées, rendues et invalidées.
+
+Chaque exécution est également rattachée à son texte SQL, avec l'issue de la recherche dans le cache de compilation
+de SQLAlchemy : une requête « chaude » doit être compilée une fois puis toujours trouvée dans le cache.
+
+Enfin, chaque session ouverte par une requête HTTP rapporte le nombre de transactions et de COMMIT qu'elle a émis.
+"""
+
+import bisect
+import time
+
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine.default import DefaultDialect
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+# Bornes supérieures (millisecondes) des classes de l'histogramme des temps d'attente
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    """Compteurs d'utilisation du pool de connexions."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Remettre les compteurs à zéro."""
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.wait_histogram: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        """Enregistrer le temps passé à attendre une connexion."""
+        self.waits += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+        self.wait_histogram[bisect.bisect_left(WAIT_BUCKETS_MS, seconds * 1000)] += 1
+        if timed_out:
+            self.timeouts += 1
+
+    def snapshot(self, pool: Optional[Pool] = None) -> Dict[str, Any]:
+        """Photographie des compteurs et de l'état courant du pool."""
+        stats: Dict[str, Any] = {
+            "pool_class": type(pool).__name__ if pool is not None else None,
+            "checked_out": self.checked_out,
+            "max_checked_out": self.max_checked_out,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait / self.waits * 1000, 3) if self.waits else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "wait_histogram_ms": {
+                **{f"<={bound}": count for bound, count in zip(WAIT_BUCKETS_MS, self.wait_histogram)},
+                f">{WAIT_BUCKETS_MS[-1]}": self.wait_histogram[-1],
+            },
+        }
+
+        if isinstance(pool, QueuePool):
+            stats.update(
+                {
+                    "size": pool.size(),
+                    "checked_in": pool.checkedin(),
+                    "overflow": max(pool.overflow(), 0),
+                    "max_overflow": pool._max_overflow,
+                    "timeout": pool.timeout(),
+                }
+            )
+
+        return stats
+
+
+# Instance unique pour le processus
+pool_metrics = PoolMetrics()
+
+
+class StatementMetrics:
+    """Compteurs d'exécution par requête SQL, avec l'issue de la recherche dans le cache de compilation."""
+
+    # Issues possibles de la recherche dans le cache de compilation
+    OUTCOMES = {
+        DefaultDialect.CACHE_HIT: "hits",
+        DefaultDialect.CACHE_MISS: "misses",
+        DefaultDialect.CACHING_DISABLED: "disabled",
+        DefaultDialect.NO_CACHE_KEY: "no_cache_key",
+        DefaultDialect.NO_DIALECT_SUPPORT: "no_dialect_support",
+    }
+
+    # Clé regroupant les requêtes au-delà du nombre maximal suivi
+    OVERFLOW_KEY = "<autres requêtes>"
+
+    def __init__(self, max_statements: int = 500) -> None:
+        self.max_statements = max_statements
+        self.reset()
+
+    def reset(self) -> None:
+        """Remettre les compteurs à zéro."""
+        self._statements: Dict[str, Counter] = {}
+        self._durations: Dict[str, float] = {}
+
+    def record(self, statement: str, cache_outcome: Any, duration: float) -> None:
+        """Enregistrer une exécution."""
+        key = statement
+        if key not in self._statements and len(self._statements) >= self.max_statements:
+            key = self.OVERFLOW_KEY
+
+        counters = self._statements.setdefault(key, Counter())
+        counters["executions"] += 1
+        counters[self.OUTCOMES.get(cache_outcome, "no_cache_key")] += 1
+        self._durations[key] = self._durations.get(key, 0.0) + duration
+
+    def snapshot(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Requêtes les plus exécutées, avec leur taux de succès dans le cache de compilation."""
+        rows = []
+        for statement, counters in self._statements.items():
+            executions = counters["executions"]
+            cacheable = counters["hits"] + counters["misses"]
+            rows.append(
+                {
+                    "statement": statement,
+                    "executions": executions,
+                    "cache_hits": counters["hits"],
+                    "cache_misses": counters["misses"],
+                    "not_cached": executions - cacheable,
+                    "cache_hit_ratio": round(counters["hits"] / cacheable, 4) if cacheable else None,
+                    "avg_ms": round(self._durations[statement] / executions * 1000, 3),
+                }
+            )
+        rows.sort(key=lambda row: row["executions"], reverse=True)
+        return rows[:limit]
+
+    def totals(self) -> Dict[str, Any]:
+        """Totaux toutes requêtes confondues."""
+        total: Counter = Counter()
+        for counters in self._statements.values():
+            total.update(counters)
+        cacheable = total["hits"] + total["misses"]
+        return {
+            "statements": len(self._statements),
+            "executions": total["executions"],
+            "cache_hits": total["hits"],
+            "cache_misses": total["misses"],
+            "cache_hit_ratio": round(total["hits"] / cacheable, 4) if cacheable else None,
+        }
+
+
+# Instance unique pour le processus
+statement_metrics = StatementMetrics()
+
+
+class TransactionMetrics:
+    """Compteurs de transactions par requête HTTP."""
+
+    # Au-delà, les requêtes sont regroupées dans la dernière classe de l'histogramme
+    MAX_TRANSACTIONS_BUCKET = 4
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Remettre les compteurs à zéro."""
+        self.requests = 0
+        self.read_only_requests = 0
+        self.requests_without_transaction = 0
+        self.transactions = 0
+        self.commits = 0
+        self.final_commits = 0
+        self.skipped_final_commits = 0
+        self.transactions_histogram: Counter = Counter()
+
+    def record(self, transactions: int, commits: int, final_commit: bool, read_only: bool = False) -> None:
+        """Enregistrer le bilan d'une session à la fin d'une requête."""
+        self.requests += 1
+        self.transactions += transactions
+        self.commits += commits
+        self.transactions_histogram[min(transactions, self.MAX_TRANSACTIONS_BUCKET)] += 1
+
+        if read_only:
+            self.read_only_requests += 1
+        elif final_commit:
+            self.final_commits += 1
+        else:
+            self.skipped_final_commits += 1
+
+        if transactions == 0:
+            self.requests_without_transaction += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Photographie des compteurs."""
+        last_bucket = self.MAX_TRANSACTIONS_BUCKET
+        return {
+            "requests": self.requests,
+            "read_only_requests": self.read_only_requests,
+            "requests_without_transaction": self.requests_without_transaction,
+            "transactions": self.transactions,
+            "commits": self.commits,
+            "final_commits": self.final_commits,
+            "skipped_final_commits": self.skipped_final_commits,
+            "avg_transactions_per_request": round(self.transactions / self.requests, 3) if self.requests else 0.0,
+            "transactions_per_request": {
+                **{str(count): self.transactions_histogram[count] for count in range(last_bucket)},
+                f"{last_bucket}+": self.transactions_histogram[last_bucket],
+            },
+        }
+
+
+# Instance unique pour le processus
+transaction_metrics = TransactionMetrics()
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Pool asynchrone standard, mesurant le temps d'attente de chaque emprunt."""
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Brancher les compteurs sur les événements du pool et des exécutions du moteur."""
+    target = engine.sync_engine
+
+    @event.listens_for(target, "connect")
+    def _on_connect(dbapi_connection: Any, connection_record: Any) -> None:
+        pool_metrics.connects += 1
+
+    @event.listens_for(target, "checkout")
+    def _on_checkout(dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+        pool_metrics.checkouts += 1
+        pool_metrics.checked_out += 1
+        pool_metrics.max_checked_out = max(pool_metrics.max_checked_out, pool_metrics.checked_out)
+
+    @event.listens_for(target, "checkin")
+    def _on_checkin(dbapi_connection: Any, connection_record: Any) -> None:
+        pool_metrics.checkins += 1
+        pool_metrics.checked_out = max(pool_metrics.checked_out - 1, 0)
+
+    @event.listens_for(target, "invalidate")
+    def _on_invalidate(dbapi_connection: Any, connection_record: Any, exception: Optional[BaseException]) -> None:
+        pool_metrics.invalidations += 1
+
+    @event.listens_for(target, "before_cursor_execute")
+    def _before_cursor_execute(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        context._immo_started_at = time.perf_counter()
+
+    @event.listens_for(target, "after_cursor_execute")
+    def _after_cursor_execute(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        started_at = getattr(context, "_immo_started_at", None)
+        duration = time.perf_counter() - started_at if started_at is not None else 0.0
+        statement_metrics.record(statement, getattr(context, "cache_hit", None), duration)
@@ -1,14 +1,27 @@
 """Extensions pour l'application FastAPI."""
 
 import logging
+import time
 
-from typing import AsyncGenerator, Optional
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Dict, List, Optional
+from uuid import uuid4
 
+from sqlalchemy import Table, UniqueConstraint, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import ORMExecuteState, Session, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
 from immo.config import settings
+from immo.db_metrics import (
+    InstrumentedAsyncAdaptedQueuePool,
+    instrument_engine,
+    pool_metrics,
+    statement_metrics,
+    transaction_metrics,
+)
 
 
 # Configuration du logging
@@ -20,46 +33,345 @@ Base = declarative_base()
 # Moteur de base de données et session asynchrone
 engine: Optional[AsyncEngine] = None
 async_session_maker = None
+async_read_session_maker = None
+
+# Réplicas en lecture (voir `get_read_db`)
+replica_router: Optional["ReplicaRouter"] = None
+
+# Retard de réplication en secondes (nul si le serveur n'est pas un réplica ou s'il a tout rejoué)
+POSTGRES_REPLICATION_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+# Clés posées dans `Session.info` pour suivre le cycle de vie de la session sur la durée d'une requête
+SESSION_WRITES_KEY = "has_writes"
+SESSION_TRANSACTIONS_KEY = "transactions"
+SESSION_COMMITS_KEY = "commits"
+
+
+def _create_session_maker(bind: AsyncEngine, read_only: bool = False) -> sessionmaker:
+    """Fabrique de sessions asynchrones pour un moteur.
+
+    En lecture seule (et si `DB_READ_ONLY_TRANSACTIONS` est actif), les transactions PostgreSQL sont ouvertes en
+    READ ONLY : asyncpg l'indique directement dans le BEGIN, sans aller-retour supplémentaire.
+    """
+    if read_only and settings.DB_READ_ONLY_TRANSACTIONS and bind.dialect.name == "postgresql":
+        bind = bind.execution_options(postgresql_readonly=True)
+
+    return sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+
+@dataclass
+class Replica:
+    """Réplica en lecture et dernier état connu de sa réplication."""
+
+    name: str
+    engine: AsyncEngine
+    session_maker: sessionmaker
+    lag: Optional[float] = None
+    checked_at: float = 0.0
+    error: Optional[str] = None
+    sessions: int = 0
+
+
+class ReplicaRouter:
+    """Répartition circulaire des lectures entre réplicas, avec repli sur le primaire.
+
+    Le retard de chaque réplica est mesuré au plus une fois par `DB_REPLICA_CHECK_INTERVAL` ; un réplica injoignable
+    ou en retard de plus de `DB_REPLICA_MAX_LAG` secondes est ignoré jusqu'à la mesure suivante.
+    """
+
+    def __init__(self, replicas: List[Replica]) -> None:
+        self.replicas = replicas
+        self.primary_fallbacks = 0
+        self._next = 0
+
+    async def choose(self) -> Optional[sessionmaker]:
+        """Fabrique de sessions du prochain réplica utilisable (None pour utiliser le primaire)."""
+        count = len(self.replicas)
+        for offset in range(count):
+            index = (self._next + offset) % count
+            replica = self.replicas[index]
+            if await self._is_usable(replica):
+                self._next = (index + 1) % count
+                replica.sessions += 1
+                return replica.session_maker
+
+        self.primary_fallbacks += 1
+        return None
+
+    async def _is_usable(self, replica: Replica) -> bool:
+        """Vérifier (périodiquement) que le réplica répond et n'est pas trop en retard."""
+        now = time.monotonic()
+        if now - replica.checked_at >= settings.DB_REPLICA_CHECK_INTERVAL:
+            # Marquer la mesure avant l'attente pour qu'une seule requête la déclenche
+            replica.checked_at = now
+            try:
+                replica.lag = await _replication_lag(replica.engine)
+                replica.error = None
+            except Exception as e:
+                replica.lag = None
+                replica.error = str(e)
+                logger.warning(f"Réplica {replica.name} indisponible: {e}")
+
+        return replica.lag is not None and replica.lag <= settings.DB_REPLICA_MAX_LAG
+
+    def stats(self) -> Dict[str, Any]:
+        """État des réplicas et répartition des sessions."""
+        return {
+            "max_lag": settings.DB_REPLICA_MAX_LAG,
+            "check_interval": settings.DB_REPLICA_CHECK_INTERVAL,
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "lag": replica.lag,
+                    "usable": replica.lag is not None and replica.lag <= settings.DB_REPLICA_MAX_LAG,
+                    "error": replica.error,
+                    "sessions": replica.sessions,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+async def _replication_lag(replica_engine: AsyncEngine) -> float:
+    """Retard de réplication d'un moteur, en secondes (toujours nul hors PostgreSQL)."""
+    async with replica_engine.connect() as connection:
+        if replica_engine.dialect.name != "postgresql":
+            await connection.execute(text("SELECT 1"))
+            return 0.0
+        result = await connection.execute(POSTGRES_REPLICATION_LAG_SQL)
+        return float(result.scalar() or 0.0)
 
 
 async def init_db() -> None:
     """Initialisation de la connexion à la base de données."""
-    global engine, async_session_maker
+    global engine, async_session_maker, async_read_session_maker, replica_router
 
     if engine is None:
         logger.info(f"Initialisation du moteur de base de données avec URL: {settings.DATABASE_URL}")
         engine = create_async_engine(
             settings.DATABASE_URL,
-            echo=settings.DEBUG,
+            echo=settings.DB_ECHO,
             future=True,
-            poolclass=NullPool if settings.ENV == "testing" else None,
+            query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+            connect_args=engine_connect_args(settings.DATABASE_URL),
+            **engine_pool_options(),
         )
+        instrument_engine(engine)
+
+        async_session_maker = _create_session_maker(engine)
+        async_read_session_maker = _create_session_maker(engine, read_only=True)
+
+        replicas = []
+        for url in settings.replica_urls:
+            replica_engine = create_async_engine(
+                url,
+                echo=settings.DB_ECHO,
+                future=True,
+                query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+                connect_args=engine_connect_args(url),
+                **engine_pool_options(instrumented=False),
+            )
+            replica_name = make_url(url).render_as_string(hide_password=True)
+            replicas.append(
+                Replica(replica_name, replica_engine, _create_session_maker(replica_engine, read_only=True))
+            )
+            logger.info(f"Réplica en lecture configuré: {replica_name}")
+
+        replica_router = ReplicaRouter(replicas) if replicas else None
+
+
+def engine_pool_options(instrumented: bool = True) -> Dict[str, Any]:
+    """Options du pool de connexions, issues de la configuration."""
+    if settings.ENV == "testing":
+        return {"poolclass": NullPool}
+
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if instrumented else AsyncAdaptedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _prepared_statement_name() -> str:
+    """Nom unique pour une requête préparée (évite les collisions entre clients derrière PgBouncer)."""
+    return f"__asyncpg_{uuid4()}__"
+
+
+def engine_connect_args(database_url: str) -> Dict[str, Any]:
+    """Arguments de connexion propres au pilote.
+
+    Pour asyncpg, on règle la taille du cache de requêtes préparées. En mode PgBouncer (pool en mode transaction),
+    une connexion serveur peut changer d'une transaction à l'autre : les caches de requêtes préparées sont désactivés
+    et les requêtes préparées reçoivent des noms uniques.
+    """
+    if make_url(database_url).get_driver_name() != "asyncpg":
+        return {}
+
+    if settings.DB_PGBOUNCER:
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": _prepared_statement_name,
+        }
+
+    return {"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE}
 
-        async_session_maker = sessionmaker(
-            engine,
-            class_=AsyncSession,
-            expire_on_commit=False,
-            autocommit=False,
-            autoflush=False,
-        )
+
+def pool_statistics() -> Dict[str, Any]:
+    """Statistiques du pool de connexions du moteur courant."""
+    return pool_metrics.snapshot(engine.sync_engine.pool if engine is not None else None)
+
+
+def statement_cache_statistics(limit: int = 50) -> Dict[str, Any]:
+    """Configuration et taux de succès des caches de requêtes."""
+    compiled_cache = getattr(engine.sync_engine, "_compiled_cache", None) if engine is not None else None
+    return {
+        "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+        "query_cache_entries": len(compiled_cache) if compiled_cache is not None else 0,
+        "prepared_statement_cache_size": 0 if settings.DB_PGBOUNCER else settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        "pgbouncer": settings.DB_PGBOUNCER,
+        "totals": statement_metrics.totals(),
+        "statements": statement_metrics.snapshot(limit),
+    }
+
+
+def transaction_statistics() -> Dict[str, Any]:
+    """Compteurs de transactions par requête."""
+    return transaction_metrics.snapshot()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session: Session, flush_context: Any) -> None:
+    """Un flush a émis des écritures."""
+    session.info[SESSION_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_execute(orm_execute_state: ORMExecuteState) -> None:
+    """Toute instruction autre qu'un SELECT (INSERT, UPDATE, DELETE, SQL brut) est considérée comme une écriture."""
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[SESSION_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_begin")
+def _count_transaction(session: Session, transaction: Any, connection: Any) -> None:
+    """Compter les transactions ouvertes par la session."""
+    session.info[SESSION_TRANSACTIONS_KEY] = session.info.get(SESSION_TRANSACTIONS_KEY, 0) + 1
+
+
+@event.listens_for(Session, "after_commit")
+def _count_commit(session: Session) -> None:
+    """Les écritures validées n'ont plus à l'être en fin de requête.
+
+    L'événement est aussi émis à la libération d'un savepoint (`begin_nested`) : la transaction principale, et ses
+    écritures antérieures, restent alors à valider.
+    """
+    if session.in_nested_transaction():
+        return
+    session.info[SESSION_COMMITS_KEY] = session.info.get(SESSION_COMMITS_KEY, 0) + 1
+    session.info.pop(SESSION_WRITES_KEY, None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_writes(session: Session) -> None:
+    """Les écritures annulées n'ont plus à être validées (pas celles d'avant un savepoint annulé)."""
+    if session.in_nested_transaction():
+        return
+    session.info.pop(SESSION_WRITES_KEY, None)
+
+
+def _has_pending_writes(session: AsyncSession) -> bool:
+    """Vérifier si la session contient des écritures non validées."""
+    return bool(session.info.get(SESSION_WRITES_KEY) or session.new or session.dirty or session.deleted)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Fournit une session de base de données pour les opérations asynchrones."""
+    """Fournit une session de base de données pour les opérations asynchrones.
+
+    La session n'est validée en fin de requête que si elle contient des écritures non encore validées : les requêtes
+    en lecture seule (et celles dont le handler a déjà validé) économisent l'aller-retour du COMMIT.
+    """
     if async_session_maker is None:
         await init_db()
 
     async with async_session_maker() as session:
+        committed = False
         try:
             yield session
-            await session.commit()
+            if _has_pending_writes(session):
+                await session.commit()
+                committed = True
         except Exception:
             await session.rollback()
             raise
         finally:
+            transaction_metrics.record(
+                transactions=session.info.get(SESSION_TRANSACTIONS_KEY, 0),
+                commits=session.info.get(SESSION_COMMITS_KEY, 0),
+                final_commit=committed,
+            )
             await session.close()
 
 
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Fournit une session pour les endpoints en lecture seule, servie par un réplica lorsqu'il y en a un d'utilisable.
+
+    Les données peuvent avoir jusqu'à `DB_REPLICA_MAX_LAG` secondes de retard : les endpoints qui relisent une
+    écriture de la même requête (ou de la précédente) doivent continuer d'utiliser `get_db`.
+    """
+    if async_session_maker is None:
+        await init_db()
+
+    session_maker = await replica_router.choose() if replica_router is not None else None
+
+    async with (session_maker or async_read_session_maker)() as session:
+        try:
+            yield session
+        finally:
+            transaction_metrics.record(
+                transactions=session.info.get(SESSION_TRANSACTIONS_KEY, 0),
+                commits=session.info.get(SESSION_COMMITS_KEY, 0),
+                final_commit=False,
+                read_only=True,
+            )
+            await session.close()
+
+
+def replica_statistics() -> Dict[str, Any]:
+    """État des réplicas en lecture."""
+    if replica_router is None:
+        return {"replicas": []}
+    return replica_router.stats()
+
+
+def violates_unique_constraint(exc: IntegrityError, table: Table, name: str) -> bool:
+    """Vérifier si une erreur d'intégrité provient de la contrainte d'unicité `name` de la table.
+
+    PostgreSQL nomme la contrainte dans son message ; SQLite n'en cite que les colonnes
+    (`UNIQUE constraint failed: projects.title, projects.user_id`).
+    """
+    message = str(exc.orig)
+    if f'"{name}"' in message:
+        return True
+    constraint = next(c for c in table.constraints if isinstance(c, UniqueConstraint) and c.name == name)
+    columns = ", ".join(f"{table.name}.{column.name}" for column in constraint.columns)
+    return f"UNIQUE constraint failed: {columns}" in message
+
+
 # Dépendance pour la pagination
 def pagination_params(skip: int = 0, limit: int = 100):
     """Paramètres de pagination pour les API."""
@@ -0,0 +1,128 @@
+"""Réponses partielles : champs choisis (`fields=`) et relations à la demande (`expand=`).
+
+Un client peut restreindre une réponse aux champs dont il a besoin (`?fields=id,title,progress`) et choisir les
+relations à inclure (`?expand=city,steps`). La sélection pilote aussi la requête : seules les colonnes nécessaires
+sont lues (`load_only`) et seules les relations demandées sont chargées, ce qui réduit d'autant le travail de la base
+et la taille des réponses sur les réseaux lents.
+
+Sans aucun de ces paramètres, l'endpoint conserve sa réponse complète habituelle. Dès que l'un d'eux est présent,
+`fields` vaut par défaut tous les champs simples du schéma et `expand` aucune relation.
+"""
+
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+
+# Sérialiseur JSON des réponses partielles : les dictionnaires sont encodés directement en octets par le cœur Rust de
+# Pydantic, sans passer par `jsonable_encoder` (qui reconstruit toute la réponse en objets Python)
+PARTIAL_RESPONSE_ADAPTER = TypeAdapter(Any)
+
+
+@dataclass(frozen=True)
+class Selection:
+    """Champs et relations demandés pour une réponse."""
+
+    fields: Tuple[str, ...]
+    expand: Tuple[str, ...]
+
+
+def _split(value: str) -> List[str]:
+    """Découper un paramètre de la forme `a,b,c`."""
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class Fieldset:
+    """Champs et relations qu'un modèle peut exposer dans une réponse partielle.
+
+    Les champs sont ceux de `schema` qui correspondent à une colonne du modèle, ou à une propriété calculée dont les
+    colonnes sont déclarées dans `computed`. Les relations de `expandable` sont sérialisées avec le schéma associé.
+    Les colonnes de `always` sont toujours lues, car le handler en a besoin (identifiant, propriétaire, ...).
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        schema: Type[BaseModel],
+        expandable: Optional[Dict[str, Type[BaseModel]]] = None,
+        computed: Optional[Dict[str, Sequence[str]]] = None,
+        always: Sequence[str] = ("id",),
+    ) -> None:
+        self.model = model
+        self.schema = schema
+        self.expandable = expandable or {}
+        self.computed = computed or {}
+        self.always = tuple(always)
+
+    @cached_property
+    def fields(self) -> Tuple[str, ...]:
+        """Champs sélectionnables, dans l'ordre du schéma (calculés après la configuration des modèles)."""
+        columns = inspect(self.model).column_attrs.keys()
+        return tuple(name for name in self.schema.model_fields if name in columns or name in self.computed)
+
+    def select(self, fields: Optional[str] = None, expand: Optional[str] = None) -> Optional[Selection]:
+        """Valider les paramètres de la requête (None s'il n'y en a aucun : réponse complète)."""
+        if fields is None and expand is None:
+            return None
+
+        requested = _split(fields) if fields else list(self.fields)
+        unknown = [name for name in requested if name not in self.fields]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Champs inconnus: {', '.join(unknown)}. Champs possibles: {', '.join(self.fields)}",
+            )
+
+        relations = _split(expand) if expand else []
+        unknown = [name for name in relations if name not in self.expandable]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Relations inconnues: {', '.join(unknown)}. "
+                f"Relations possibles: {', '.join(self.expandable) or 'aucune'}",
+            )
+
+        # Conserver l'ordre du schéma, sans doublons
+        return Selection(
+            fields=tuple(name for name in self.fields if name in requested),
+            expand=tuple(name for name in self.expandable if name in relations),
+        )
+
+    def options(self, selection: Selection) -> List[Any]:
+        """Options de chargement limitant la requête aux colonnes et relations sélectionnées."""
+        columns = set(self.always)
+        for name in selection.fields:
+            columns.update(self.computed.get(name, (name,)))
+
+        options: List[Any] = [load_only(*(getattr(self.model, name) for name in sorted(columns)))]
+        for name in selection.expand:
+            relationship = getattr(self.model, name)
+            # Collections en une requête séparée (pas de lignes démultipliées), relations simples par jointure
+            options.append(selectinload(relationship) if relationship.property.uselist else joinedload(relationship))
+        return options
+
+    def serialize(self, obj: Any, selection: Selection) -> Dict[str, Any]:
+        """Sérialiser un objet en se limitant à la sélection (sans déclencher de chargement)."""
+        data = {name: getattr(obj, name) for name in selection.fields}
+        for name in selection.expand:
+            schema = self.expandable[name]
+            value = getattr(obj, name)
+            if isinstance(value, list):
+                data[name] = [schema.model_validate(item) for item in value]
+            else:
+                data[name] = schema.model_validate(value) if value is not None else None
+        return data
+
+    def response(self, data: Any, selection: Selection) -> Response:
+        """Réponse partielle pour un objet ou une liste d'objets."""
+        if isinstance(data, (list, tuple)):
+            content: Any = [self.serialize(obj, selection) for obj in data]
+        else:
+            content = self.serialize(data, selection)
+        return Response(content=PARTIAL_RESPONSE_ADAPTER.dump_json(content), media_type="application/json")
@@ -0,0 +1,53 @@
+"""Cache HTTP : validateurs (`ETag`, `Last-Modified`) et requêtes conditionnelles.
+
+Un endpoint dont la réponse ne dépend que d'une donnée versionnée annonce la version dans un `ETag` fort et la date
+de la donnée dans `Last-Modified`. Un client qui renvoie ces validateurs (`If-None-Match`, `If-Modified-Since`)
+reçoit une réponse `304 Not Modified` sans corps tant que la donnée n'a pas changé : un rechargement de page ne coûte
+alors qu'un échange d'en-têtes.
+"""
+
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict
+
+from fastapi import HTTPException, Request, Response, status
+
+
+def cache_headers(etag: str, last_modified: datetime, cache_control: str) -> Dict[str, str]:
+    """En-têtes de cache d'une réponse (`last_modified` en UTC)."""
+    return {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": cache_control,
+    }
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """Vérifier si la copie du client est à jour (RFC 9110, `If-None-Match` prime sur `If-Modified-Since`)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Comparaison faible : un `W/` ajouté par un proxy (compression, ...) ne change pas la représentation
+        candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            # Date invalide : l'en-tête est ignoré
+            return False
+
+    return False
+
+
+def conditional_get(
+    request: Request, response: Response, etag: str, last_modified: datetime, cache_control: str
+) -> None:
+    """Poser les en-têtes de cache sur la réponse, ou répondre `304 Not Modified` si le client est à jour."""
+    headers = cache_headers(etag, last_modified, cache_control)
+
+    if is_not_modified(request, etag, last_modified):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
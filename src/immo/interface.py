@@ -7,18 +7,22 @@ from pathlib import Path
 
 from fastapi import Depends, FastAPI, Request, status
 from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from immo.compression import CompressionMiddleware, PrecompressedStaticFiles
 from immo.config import settings
 from immo.extensions import get_db, init_db
 from immo.projects.router import router as projects_router
+from immo.quotas.router import router as quotas_router
 from immo.seed import seed_database
 from immo.services.router import router as services_router
 from immo.subscriptions.router import router as subscriptions_router
 from immo.users.admin_router import router as admin_router
+from immo.users.passwords import password_hasher
+from immo.users.permissions import rbac_cache
 from immo.users.router import router as users_router
+from immo.utils.references import reference_cache
 from immo.utils.router import router as utils_router
 
 
@@ -50,11 +54,26 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Erreur lors de l'initialisation des données de base: {e}")
 
+    # Préchargement du cache des rôles et permissions
+    try:
+        async for db in get_db():
+            await rbac_cache.warm(db)
+    except Exception as e:
+        logger.error(f"Erreur lors du préchargement du cache RBAC: {e}")
+
+    # Préchargement des données de référence (pays, villes, devises, statuts de projet)
+    try:
+        async for db in get_db():
+            await reference_cache.warm(db)
+    except Exception as e:
+        logger.error(f"Erreur lors du préchargement des données de référence: {e}")
+
     # Rend le contrôle à FastAPI
     yield
 
     # Code à exécuter à l'arrêt
     logger.info("Fermeture de l'application")
+    password_hasher.shutdown()
 
 
 # Initialisation de l'application avec le gestionnaire de cycle de vie
@@ -67,8 +86,17 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# Montage des fichiers statiques
-app.mount("/static", StaticFiles(directory=str(APP_DIR / "static")), name="static")
+# Compression des réponses API et HTML selon `Accept-Encoding`
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
+# Montage des fichiers statiques (variantes `.br`/`.gz` produites par `poetry run precompress-static`)
+app.mount("/static", PrecompressedStaticFiles(directory=str(APP_DIR / "static")), name="static")
 
 # Templates Jinja2 pour le rendu HTML
 templates = Jinja2Templates(directory=str(APP_DIR / "templates"))
@@ -79,6 +107,7 @@ app.include_router(users_router, prefix="/api/users", tags=["Utilisateurs"])
 app.include_router(admin_router, prefix="/api/admin", tags=["Administration"])
 app.include_router(projects_router, prefix="/api/projects", tags=["Projets"])
 app.include_router(services_router, prefix="/api/services", tags=["Services"])
+app.include_router(quotas_router, prefix="/api/quotas", tags=["Quotas"])
 app.include_router(subscriptions_router, prefix="/api/subscriptions", tags=["Abonnements"])
 
 
@@ -86,6 +115,7 @@ app.include_router(subscriptions_router, prefix="/api/subscriptions", tags=["Abo
 async def read_root(request: Request, db: AsyncSession = Depends(get_db)):
     """Page d'accueil de l'application."""
     return templates.TemplateResponse(
+        request,
         "index.html",
         {
             "request": request,
@@ -100,17 +130,17 @@ async def read_root(request: Request, db: AsyncSession = Depends(get_db)):
 # Route pour la page de connexion
 @app.get("/login")
 async def login(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
+    return templates.TemplateResponse(request, "login.html", {"request": request})
 
 # Route pour la page d'inscription
 @app.get("/register")
 async def register(request: Request):
-    return templates.TemplateResponse("register.html", {"request": request})
+    return templates.TemplateResponse(request, "register.html", {"request": request})
 
 # Route pour souscrire à un abonnement
 @app.get("/subscribe")
 async def subscribe(request: Request):
-    return templates.TemplateResponse("subscribe.html", {"request": request})
+    return templates.TemplateResponse(request, "subscribe.html", {"request": request})
 
 # Route pour gérer les abonnements
 @app.get("/my-subscription", response_class=HTMLResponse)
@@ -184,6 +214,7 @@ async def manage_subscription(request: Request):
     ]
 
     return templates.TemplateResponse(
+        request,
         "manage_subscription.html",
         {
             "request": request,
@@ -250,6 +281,7 @@ async def user_profile(request: Request):
         "privacy_settings": privaty_settings,
     }  
     return templates.TemplateResponse(
+        request,
         "user_account.html",
         {
             "request": request,
@@ -374,6 +406,7 @@ async def create_project(request: Request):
     ]
 
     return templates.TemplateResponse(
+        request,
         "create_project.html",
         {
             "request": request,
@@ -429,6 +462,7 @@ async def create_step(request: Request):
     }
 
     return templates.TemplateResponse(
+        request,
         "add_step.html",
         {
             "request": request,
@@ -518,7 +552,7 @@ async def dashboard(request: Request):
         }
     ]
     
-    return templates.TemplateResponse("main.html", {
+    return templates.TemplateResponse(request, "main.html", {
         "request": request,
         "user": user_data,
         "projects": user_data["projects"],
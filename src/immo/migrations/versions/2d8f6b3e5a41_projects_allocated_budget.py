@@ -0,0 +1,34 @@
+"""Budget alloué des projets, tenu à jour à chaque modification d'étape
+
+Revision ID: 2d8f6b3e5a41
+Revises: 7c1e4a2b9d10
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "2d8f6b3e5a41"
+down_revision = "7c1e4a2b9d10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("projects", sa.Column("allocated_budget", sa.Integer(), nullable=False, server_default="0"))
+    # Même calcul que `immo.projects.aggregates.reconcile_project_aggregates`
+    op.execute(
+        """
+        UPDATE projects SET allocated_budget = coalesce(
+            (SELECT sum(steps.budget) FROM steps WHERE steps.project_id = projects.id), 0
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("projects", "allocated_budget")
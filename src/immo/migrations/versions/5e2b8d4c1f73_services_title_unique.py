@@ -0,0 +1,39 @@
+"""Unicité du titre des services de chaque utilisateur
+
+Revision ID: 5e2b8d4c1f73
+Revises: 9a4c7e1f0b62
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "5e2b8d4c1f73"
+down_revision = "9a4c7e1f0b62"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Renommer les doublons existants (le plus ancien garde son titre) : "Titre (id)", tronqué à 64 caractères
+    op.execute(
+        """
+        UPDATE services
+        SET title = substr(title, 1, 61 - length(CAST(id AS VARCHAR))) || ' (' || CAST(id AS VARCHAR) || ')'
+        WHERE EXISTS (
+            SELECT 1 FROM services AS older_services
+            WHERE older_services.user_id = services.user_id
+              AND older_services.title = services.title
+              AND older_services.id < services.id
+        )
+        """
+    )
+    with op.batch_alter_table("services") as batch_op:
+        batch_op.create_unique_constraint("_title_service_user_uc", ["title", "user_id"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("services") as batch_op:
+        batch_op.drop_constraint("_title_service_user_uc", type_="unique")
@@ -0,0 +1,68 @@
+"""Ordonner les étapes par rang espacé au lieu de leur numéro
+
+Revision ID: 7c1e4a2b9d10
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "7c1e4a2b9d10"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Valeur de `immo.projects.models.RANK_GAP` à la création de cette révision (figée : le modèle peut évoluer)
+RANK_GAP = 1024
+
+
+def upgrade() -> None:
+    op.add_column("steps", sa.Column("rank", sa.Integer(), nullable=True))
+    # Rang = position de l'étape dans son projet × RANK_GAP, soit `number * RANK_GAP` pour des numéros continus ;
+    # la position (départagée par l'id) garantit l'unicité même si des numéros se répètent ou manquent
+    op.execute(
+        f"""
+        UPDATE steps SET rank = {RANK_GAP} * (
+            SELECT count(*) FROM steps AS other_steps
+            WHERE other_steps.project_id = steps.project_id
+              AND (other_steps.number < steps.number
+                   OR (other_steps.number = steps.number AND other_steps.id <= steps.id))
+        )
+        """
+    )
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("ALTER TABLE steps DROP CONSTRAINT IF EXISTS _number_step_project_uc")
+    with op.batch_alter_table("steps") as batch_op:
+        batch_op.alter_column("rank", existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column("number")
+    if op.get_bind().dialect.name == "postgresql":
+        # Différée jusqu'au commit pour permettre les échanges de rangs (voir immo.projects.ordering)
+        op.create_unique_constraint(
+            "_rank_step_project_uc", "steps", ["project_id", "rank"], deferrable=True, initially="DEFERRED"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_constraint("_rank_step_project_uc", "steps", type_="unique")
+    op.add_column("steps", sa.Column("number", sa.Integer(), nullable=True))
+    op.execute(
+        """
+        UPDATE steps SET number = (
+            SELECT count(*) FROM steps AS other_steps
+            WHERE other_steps.project_id = steps.project_id AND other_steps.rank <= steps.rank
+        )
+        """
+    )
+    with op.batch_alter_table("steps") as batch_op:
+        batch_op.alter_column("number", existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column("rank")
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_unique_constraint(
+            "_number_step_project_uc", "steps", ["project_id", "number"], deferrable=True, initially="DEFERRED"
+        )
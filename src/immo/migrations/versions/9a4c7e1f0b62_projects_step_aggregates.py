@@ -0,0 +1,61 @@
+"""Nombre d'étapes, étapes terminées et points d'avancement des projets
+
+Revision ID: 9a4c7e1f0b62
+Revises: 2d8f6b3e5a41
+Create Date: 2026-10-18 09:20:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+from immo.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = "9a4c7e1f0b62"
+down_revision = "2d8f6b3e5a41"
+branch_labels = None
+depends_on = None
+
+# Valeur de `immo.projects.aggregates.COMPLETED_PROGRESS` à la création de cette révision
+COMPLETED_PROGRESS = 100
+
+
+def upgrade() -> None:
+    op.add_column("projects", sa.Column("total_steps", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("projects", sa.Column("completed_steps", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("projects", sa.Column("progress_points", sa.BigInteger(), nullable=False, server_default="0"))
+
+    # Même calcul que `immo.projects.aggregates.reconcile_project_aggregates`, selon la pondération configurée
+    weight_by_budget = settings.PROJECT_PROGRESS_WEIGHTING == "budget"
+    points = "coalesce(steps.progress, 0) * CAST(steps.budget AS BIGINT)" if weight_by_budget else "steps.progress"
+    op.execute(
+        f"""
+        UPDATE projects SET
+            total_steps = (SELECT count(*) FROM steps WHERE steps.project_id = projects.id),
+            completed_steps = (
+                SELECT count(*) FROM steps
+                WHERE steps.project_id = projects.id AND coalesce(steps.progress, 0) >= {COMPLETED_PROGRESS}
+            ),
+            progress_points = coalesce(
+                (SELECT sum(coalesce({points}, 0)) FROM steps WHERE steps.project_id = projects.id), 0
+            )
+        """
+    )
+    # Instruction distincte : dans un `UPDATE`, les expressions lisent les valeurs d'avant la mise à jour
+    denominator = "allocated_budget" if weight_by_budget else "total_steps"
+    op.execute(
+        f"""
+        UPDATE projects SET progress = CASE
+            WHEN {denominator} > 0 THEN progress_points / {denominator} ELSE 0
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("projects", "progress_points")
+    op.drop_column("projects", "completed_steps")
+    op.drop_column("projects", "total_steps")
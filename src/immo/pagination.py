@@ -0,0 +1,31 @@
+"""Pagination par curseur (keyset).
+
+Plutôt que de sauter `OFFSET` lignes (que la base doit tout de même parcourir), une page reprend après la dernière
+ligne de la précédente : le client renvoie le curseur opaque fourni avec la page, qui encode la clé de tri de cette
+dernière ligne. Le coût d'une page ne dépend donc pas de sa profondeur, et une insertion entre deux pages ne décale
+pas les résultats.
+"""
+
+import base64
+import json
+
+from datetime import datetime
+from typing import Tuple
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encoder la clé de tri `(created_at, id)` d'une ligne en curseur opaque."""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Décoder un curseur produit par `encode_cursor`."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Curseur de pagination invalide") from None
@@ -0,0 +1,153 @@
+"""Agrégats des étapes dénormalisés sur les projets.
+
+Chaque projet porte, à côté de ses propres colonnes, des agrégats de ses étapes : budget alloué, nombre d'étapes,
+nombre d'étapes terminées et avancement global. Ils sont maintenus de façon incrémentale : chaque création,
+modification ou suppression d'étape reporte sa contribution sur le projet par un seul `UPDATE ... SET colonne =
+colonne + :delta`, dans la même transaction que la modification de l'étape. Les contrôles de budget, les listes de
+projets et le tableau de bord n'ont ainsi plus besoin de charger ni d'agréger les étapes.
+
+L'avancement du projet est la moyenne de celui de ses étapes, pondérée selon `PROJECT_PROGRESS_WEIGHTING` : chaque
+étape compte autant (`count`) ou pèse son budget (`budget`). Le projet conserve le numérateur de cette moyenne
+(`progress_points`) pour pouvoir la mettre à jour sans relire les étapes.
+
+`reconcile_project_aggregates` recalcule les valeurs exactes depuis les étapes pour corriger une éventuelle dérive
+(modification directe en base, changement de pondération, ...) ; elle est exposée par la commande
+`reconcile-projects`.
+"""
+
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import BigInteger, case, cast, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from immo.config import settings
+from immo.projects.models import Project, Step
+
+
+# Avancement (en pourcentage) à partir duquel une étape est considérée comme terminée
+COMPLETED_PROGRESS = 100
+
+
+def weight_by_budget() -> bool:
+    """Vérifier si l'avancement des projets est pondéré par le budget des étapes."""
+    if settings.PROJECT_PROGRESS_WEIGHTING not in ("count", "budget"):
+        raise ValueError(f"Pondération de l'avancement inconnue: {settings.PROJECT_PROGRESS_WEIGHTING}")
+    return settings.PROJECT_PROGRESS_WEIGHTING == "budget"
+
+
+@dataclass(frozen=True)
+class StepContribution:
+    """Contribution d'une ou plusieurs étapes aux agrégats de leur projet."""
+
+    allocated_budget: int = 0
+    total_steps: int = 0
+    completed_steps: int = 0
+    progress_points: int = 0
+
+    @classmethod
+    def of(cls, budget: int, progress: Optional[int]) -> "StepContribution":
+        """Contribution d'une étape."""
+        progress = progress or 0
+        return cls(
+            allocated_budget=budget,
+            total_steps=1,
+            completed_steps=int(progress >= COMPLETED_PROGRESS),
+            progress_points=progress * budget if weight_by_budget() else progress,
+        )
+
+    def __add__(self, other: "StepContribution") -> "StepContribution":
+        return StepContribution(*(getattr(self, f.name) + getattr(other, f.name) for f in fields(self)))
+
+    def __sub__(self, other: "StepContribution") -> "StepContribution":
+        return StepContribution(*(getattr(self, f.name) - getattr(other, f.name) for f in fields(self)))
+
+    def __bool__(self) -> bool:
+        return any(getattr(self, f.name) for f in fields(self))
+
+
+def compute_progress(progress_points: int, allocated_budget: int, total_steps: int) -> int:
+    """Avancement d'un projet (en pourcentage) à partir de ses agrégats."""
+    denominator = allocated_budget if weight_by_budget() else total_steps
+    return progress_points // denominator if denominator > 0 else 0
+
+
+async def adjust_project_aggregates(db: AsyncSession, project_id: int, delta: StepContribution) -> None:
+    """Reporter sur le projet la variation de la contribution de ses étapes.
+
+    Dans un `UPDATE`, les expressions de droite lisent les valeurs d'avant la mise à jour : l'avancement est donc
+    recalculé à partir des anciennes valeurs augmentées de la variation.
+    """
+    if not delta:
+        return
+
+    progress_points = Project.progress_points + delta.progress_points
+    if weight_by_budget():
+        denominator = Project.allocated_budget + delta.allocated_budget
+    else:
+        denominator = Project.total_steps + delta.total_steps
+
+    await db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(
+            allocated_budget=Project.allocated_budget + delta.allocated_budget,
+            total_steps=Project.total_steps + delta.total_steps,
+            completed_steps=Project.completed_steps + delta.completed_steps,
+            progress_points=progress_points,
+            progress=case((denominator > 0, progress_points // denominator), else_=0),
+        )
+        .execution_options(synchronize_session="fetch")
+    )
+
+
+async def reconcile_project_aggregates(
+    db: AsyncSession, dry_run: bool = False
+) -> List[Tuple[int, Dict[str, Tuple[int, int]]]]:
+    """Recalculer les agrégats des projets depuis leurs étapes.
+
+    Retourne les projets dont les agrégats dérivaient, avec pour chaque colonne concernée la valeur enregistrée et la
+    valeur exacte ; ils sont corrigés par une seule instruction `UPDATE` groupée, sauf en mode `dry_run`. La
+    transaction n'est pas validée.
+    """
+    progress = func.coalesce(Step.progress, 0)
+    totals = (
+        select(
+            Step.project_id,
+            func.sum(Step.budget).label("allocated_budget"),
+            func.count().label("total_steps"),
+            func.sum(case((progress >= COMPLETED_PROGRESS, 1), else_=0)).label("completed_steps"),
+            # Produit calculé en BIGINT : avancement × budget dépasse la capacité d'un INTEGER
+            func.sum(progress * cast(Step.budget, BigInteger) if weight_by_budget() else progress).label(
+                "progress_points"
+            ),
+        )
+        .group_by(Step.project_id)
+        .subquery()
+    )
+    columns = ("allocated_budget", "total_steps", "completed_steps", "progress_points", "progress")
+
+    result = await db.execute(
+        select(Project.id, *(getattr(Project, column) for column in columns), *(totals.c[c] for c in columns[:-1]))
+        .outerjoin(totals, totals.c.project_id == Project.id)
+        .order_by(Project.id)
+    )
+
+    drifted: List[Tuple[int, Dict[str, Tuple[int, int]]]] = []
+    for project_id, *values in result.all():
+        stored, exact = values[: len(columns)], [int(value or 0) for value in values[len(columns) :]]
+        exact.append(compute_progress(exact[3], exact[0], exact[1]))
+        changes = {column: (old, new) for column, old, new in zip(columns, stored, exact) if old != new}
+        if changes:
+            drifted.append((project_id, changes))
+
+    if drifted and not dry_run:
+        await db.execute(
+            update(Project),
+            [
+                {"id": project_id, **{column: new for column, (_, new) in changes.items()}}
+                for project_id, changes in drifted
+            ],
+        )
+
+    return drifted
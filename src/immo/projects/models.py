@@ -1,13 +1,30 @@
 """Modèles de données pour les projets."""
 
 from datetime import datetime
-
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
-from sqlalchemy.orm import relationship
+from typing import List, Optional
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    func,
+    inspect,
+    select,
+)
+from sqlalchemy.orm import column_property, relationship
 
 from immo.extensions import Base
 
 
+# Écart entre les rangs de deux étapes consécutives après une redistribution (voir immo.projects.ordering)
+RANK_GAP = 1024
+
+
 class Project(Base):
     """Modèle de données pour les projets."""
 
@@ -26,15 +43,26 @@ class Project(Base):
     end_at = Column(DateTime)
     progress = Column(Integer, default=0)
 
+    # Agrégats des étapes, tenus à jour à chaque modification d'étape (voir immo.projects.aggregates)
+    allocated_budget = Column(Integer, nullable=False, default=0, server_default="0")
+    total_steps = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_steps = Column(Integer, nullable=False, default=0, server_default="0")
+    # BIGINT : en pondération par budget, avancement × budget dépasse 2^31 dès 21 millions de francs CFA à 100 %
+    progress_points = Column(BigInteger, nullable=False, default=0, server_default="0")
+
     # Relations
     author = relationship("User", back_populates="projects")
     status_project = relationship("StatusProject", back_populates="projects")
     city = relationship("City", back_populates="projects")
     currency = relationship("Currency", back_populates="projects")
-    steps = relationship("Step", back_populates="project", cascade="all, delete-orphan")
+    steps = relationship("Step", back_populates="project", cascade="all, delete-orphan", order_by="Step.rank")
 
     # Contraintes
-    __table_args__ = (UniqueConstraint("title", "user_id", name="_title_project_user_uc"),)
+    __table_args__ = (
+        UniqueConstraint("title", "user_id", name="_title_project_user_uc"),
+        # Pagination par curseur des projets d'un utilisateur (voir immo.pagination)
+        Index("ix_projects_user_created_id", "user_id", "created_at", "id"),
+    )
 
     def __repr__(self) -> str:
         """Représentation de l'objet."""
@@ -43,7 +71,12 @@ class Project(Base):
     @property
     def unallocated_budget(self) -> int:
         """Budget non alloué."""
-        return int(self.budget - sum(step.budget for step in self.steps))
+        return int(self.budget - (self.allocated_budget or 0))
+
+    @property
+    def loaded_steps(self) -> Optional[List["Step"]]:
+        """Étapes du projet si elles ont été chargées par la requête, None sinon (sans déclencher de chargement)."""
+        return None if "steps" in inspect(self).unloaded else self.steps
 
 
 class Step(Base):
@@ -54,7 +87,7 @@ class Step(Base):
     id = Column(Integer, primary_key=True)
     title = Column(String(64), index=True)
     description = Column(String(1000))
-    number = Column(Integer, nullable=False)
+    rank = Column(Integer, nullable=False)
     budget = Column(Integer, nullable=False)
     project_id = Column(Integer, ForeignKey("projects.id"), index=True)
     creator_id = Column(Integer, ForeignKey("users.id"))
@@ -68,8 +101,24 @@ class Step(Base):
     creator = relationship("User")
 
     # Contraintes
-    __table_args__ = (UniqueConstraint("title", "project_id", name="_title_step_project_uc"),)
+    __table_args__ = (
+        UniqueConstraint("title", "project_id", name="_title_step_project_uc"),
+        # Différée jusqu'au commit pour permettre les échanges de rangs (voir immo.projects.ordering)
+        UniqueConstraint(
+            "project_id", "rank", name="_rank_step_project_uc", deferrable=True, initially="DEFERRED"
+        ).ddl_if(dialect="postgresql"),
+    )
 
     def __repr__(self) -> str:
         """Représentation de l'objet."""
         return f"<Step {self.title}>"
+
+
+# Numéro de l'étape dans son projet (à partir de 1), dérivé de son rang
+_other_steps = Step.__table__.alias("other_steps")
+Step.number = column_property(
+    select(func.count(_other_steps.c.id))
+    .where(_other_steps.c.project_id == Step.project_id, _other_steps.c.rank <= Step.rank)
+    .correlate_except(_other_steps)
+    .scalar_subquery()
+)
@@ -0,0 +1,145 @@
+"""Ordre des étapes d'un projet.
+
+Chaque étape porte un rang entier creux (`Step.rank`, espacé de `RANK_GAP`) ; son numéro (`Step.number`) en est
+dérivé. Insérer ou déplacer une étape ne modifie donc qu'une seule ligne : elle reçoit un rang situé entre ceux de
+ses nouvelles voisines, et la suppression d'une étape ne touche pas les autres. Lorsque deux voisines n'ont plus
+d'écart disponible, les rangs du projet sont redistribués par une seule instruction `UPDATE`.
+
+Sous PostgreSQL, la contrainte d'unicité `(project_id, rank)` est différée à la validation de la transaction ; la
+ligne du projet est verrouillée (`FOR UPDATE`) pour sérialiser les réordonnancements concurrents d'un même projet.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from immo.projects.models import RANK_GAP, Project, Step
+
+
+async def lock_project(db: AsyncSession, project_id: int) -> None:
+    """Verrouiller le projet jusqu'à la fin de la transaction (sans effet sous SQLite)."""
+    await db.execute(select(Project.id).where(Project.id == project_id).with_for_update())
+
+
+async def rebalance(db: AsyncSession, project_id: int) -> None:
+    """Redistribuer les rangs du projet (RANK_GAP, 2 × RANK_GAP, ...) en conservant l'ordre."""
+    positions = (
+        select(Step.id, func.row_number().over(order_by=(Step.rank, Step.id)).label("position"))
+        .where(Step.project_id == project_id)
+        .subquery()
+    )
+    await db.execute(
+        update(Step)
+        .where(Step.id == positions.c.id)
+        .values(rank=positions.c.position * RANK_GAP)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def _neighbour_ranks(
+    db: AsyncSession, project_id: int, position: int, exclude_step_id: Optional[int]
+) -> List[Optional[int]]:
+    """Rangs des étapes qui encadreront la position visée (None s'il n'y en a pas)."""
+    query = select(Step.rank).where(Step.project_id == project_id).order_by(Step.rank)
+    if exclude_step_id is not None:
+        query = query.where(Step.id != exclude_step_id)
+
+    if position == 1:
+        result = await db.execute(query.limit(1))
+        ranks: List[Optional[int]] = [None, *result.scalars().all()]
+    else:
+        result = await db.execute(query.offset(position - 2).limit(2))
+        ranks = list(result.scalars().all())
+
+    return ranks + [None] * (2 - len(ranks))
+
+
+async def rank_for_position(
+    db: AsyncSession, project_id: int, position: int, exclude_step_id: Optional[int] = None
+) -> int:
+    """Rang à donner à une étape pour qu'elle occupe le numéro `position` (à partir de 1).
+
+    `exclude_step_id` désigne l'étape déplacée, qui ne compte pas parmi ses propres voisines.
+    """
+    before, after = await _neighbour_ranks(db, project_id, position, exclude_step_id)
+
+    if before is None and after is None:
+        return RANK_GAP
+    if before is None:
+        return after - RANK_GAP
+    if after is None:
+        return before + RANK_GAP
+    if after - before > 1:
+        return (before + after) // 2
+
+    # Plus d'écart entre les voisines : redistribuer puis recalculer
+    await rebalance(db, project_id)
+    before, after = await _neighbour_ranks(db, project_id, position, exclude_step_id)
+    if after is None:
+        return before + RANK_GAP
+    return (before + after) // 2
+
+
+async def reorder_steps(db: AsyncSession, project_id: int, step_ids: Sequence[int]) -> None:
+    """Réordonner les étapes listées entre elles, en une seule instruction.
+
+    Les étapes listées échangent leurs rangs actuels pour suivre l'ordre demandé ; les autres étapes ne bougent
+    pas. Une liste complète des étapes du projet définit donc l'ordre total.
+    """
+    result = await db.execute(select(Step.rank).where(Step.id.in_(step_ids)).order_by(Step.rank))
+    ranks: Dict[int, int] = dict(zip(step_ids, result.scalars().all()))
+
+    await db.execute(
+        update(Step)
+        .where(Step.project_id == project_id, Step.id.in_(step_ids))
+        .values(rank=case(ranks, value=Step.id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def plan_insertions(existing_ranks: Sequence[int], positions: Sequence[int]) -> Optional[List[int]]:
+    """Rangs de nouvelles étapes insérées successivement aux numéros `positions`, sans toucher aux existantes.
+
+    `existing_ranks` est la liste triée des rangs actuels du projet. Les nouvelles étapes placées entre deux étapes
+    existantes se partagent régulièrement l'écart qui les sépare ; retourne None si cet écart est insuffisant (il
+    faut alors redistribuer les rangs du projet).
+    """
+    # (nouvelle étape ?, index dans le lot ou rang existant), dans l'ordre final
+    slots: List[Tuple[bool, int]] = [(False, rank) for rank in existing_ranks]
+    for index, position in enumerate(positions):
+        slots.insert(position - 1, (True, index))
+
+    ranks: List[int] = [0] * len(positions)
+
+    def spread(lower: Optional[int], upper: Optional[int], indexes: List[int]) -> bool:
+        if not indexes:
+            return True
+        span = RANK_GAP * (len(indexes) + 1)
+        if lower is None and upper is None:
+            lower = 0
+        if lower is None:
+            lower = upper - span
+        if upper is None:
+            upper = lower + span
+        step = (upper - lower) // (len(indexes) + 1)
+        if step < 1:
+            return False
+        for offset, index in enumerate(indexes, start=1):
+            ranks[index] = lower + offset * step
+        return True
+
+    previous: Optional[int] = None
+    pending: List[int] = []
+    for is_new, value in slots:
+        if is_new:
+            pending.append(value)
+            continue
+        if not spread(previous, value, pending):
+            return None
+        previous, pending = value, []
+
+    if not spread(previous, None, pending):
+        return None
+
+    return ranks
@@ -1,44 +1,130 @@
 """Router pour les projets."""
 
-from typing import Any, List
+from typing import Any, Dict, List, Optional, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, update
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
-
-from immo.extensions import get_db
-from immo.projects.models import Project, Step
+from sqlalchemy.orm import joinedload, selectinload
+
+from immo.extensions import get_db, get_read_db, violates_unique_constraint
+from immo.fieldsets import Fieldset
+from immo.pagination import decode_cursor, encode_cursor
+from immo.projects.aggregates import StepContribution, adjust_project_aggregates
+from immo.projects.models import RANK_GAP, Project, Step
+from immo.projects.ordering import lock_project, plan_insertions, rank_for_position, rebalance, reorder_steps
 from immo.projects.schemas import (
     ProjectCreate,
+    ProjectDashboard,
+    ProjectInDB,
+    ProjectPage,
     ProjectUpdate,
     ProjectWithDetails,
+    StepBatchCreate,
     StepCreate,
     StepInDB,
+    StepOrderUpdate,
     StepUpdate,
 )
+from immo.quotas.counters import Quota
 from immo.users.models import User
-from immo.users.router import get_current_user
-from immo.utils.models import City, Currency, StatusProject
+from immo.users.permissions import Principal
+from immo.users.router import get_current_principal, get_current_user, principal_from_user
+from immo.utils.references import reference_cache
+from immo.utils.schemas import CityInDB, CurrencyInDB, StatusProjectInDB
 
 
 router = APIRouter()
 
 
+# Champs et relations des réponses partielles (paramètres `fields` et `expand`)
+PROJECT_FIELDSET = Fieldset(
+    Project,
+    ProjectInDB,
+    expandable={"status_project": StatusProjectInDB, "city": CityInDB, "currency": CurrencyInDB, "steps": StepInDB},
+    computed={"unallocated_budget": ("budget", "allocated_budget")},
+    always=("id", "user_id"),
+)
+STEP_FIELDSET = Fieldset(Step, StepInDB, always=("id", "project_id"))
+
+# Quota de projets par utilisateur (voir immo.quotas.counters)
+PROJECT_QUOTA = Quota(
+    "projects",
+    Project,
+    detail="Vous avez déjà atteint le nombre maximum de projets",
+    unlimited_permission="CreateMoreThanFiveProjects",
+)
+
+# Relations pouvant être incluses dans la liste résumée des projets
+PROJECT_SUMMARY_INCLUDES = {"steps"}
+
+
+def project_details_options() -> List[Any]:
+    """Chargement par défaut d'un projet avec tous ses détails (schéma ProjectWithDetails)."""
+    return [
+        joinedload(Project.status_project),
+        joinedload(Project.city),
+        joinedload(Project.currency),
+        selectinload(Project.steps),
+    ]
+
+
+async def project_details(db: AsyncSession, project: Project, steps: Sequence[Step]) -> Dict[str, Any]:
+    """Réponse `ProjectWithDetails` construite sans relire la base.
+
+    Le statut, la ville et la devise viennent du cache des données de référence (rechargé si l'une d'elles n'y figure
+    pas encore).
+    """
+    references = await reference_cache.resolve(db, project.status_project_id, project.city_id, project.currency_id)
+
+    return {
+        **ProjectInDB.model_validate(project).model_dump(),
+        "status_project": references.status_projects.get(project.status_project_id),
+        "city": references.cities.get(project.city_id) if project.city_id is not None else None,
+        "currency": references.currencies.get(project.currency_id) if project.currency_id is not None else None,
+        "steps": steps,
+    }
+
+
+async def commit_step_changes(db: AsyncSession) -> None:
+    """Valider une modification des étapes, en signalant un conflit de numérotation concurrent."""
+    try:
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        if violates_unique_constraint(exc, Step.__table__, "_rank_step_project_uc"):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Les étapes du projet ont été modifiées simultanément, veuillez réessayer",
+            ) from None
+        if violates_unique_constraint(exc, Step.__table__, "_title_step_project_uc"):
+            # Étape du même titre ajoutée entre la vérification et le commit
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Ce projet a déjà une étape avec ce titre"
+            ) from None
+        raise
+
+
 @router.get("/", response_model=List[ProjectWithDetails])
 async def get_projects(
-    skip: int = 0, limit: int = 100, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db),
 ) -> Any:
-    """Récupérer tous les projets de l'utilisateur courant."""
+    """Récupérer tous les projets de l'utilisateur courant.
+
+    `fields` et `expand` restreignent la réponse aux champs et relations listés (voir immo.fieldsets).
+    """
+    selection = PROJECT_FIELDSET.select(fields, expand)
+
     # Construire la requête
     query = (
         select(Project)
-        .options(
-            joinedload(Project.status_project),
-            joinedload(Project.city),
-            joinedload(Project.currency),
-            joinedload(Project.steps),
-        )
+        .options(*(PROJECT_FIELDSET.options(selection) if selection else project_details_options()))
         .where(Project.user_id == current_user.id)
         .offset(skip)
         .limit(limit)
@@ -48,9 +134,82 @@ async def get_projects(
     result = await db.execute(query)
     projects = result.unique().scalars().all()
 
+    if selection:
+        return PROJECT_FIELDSET.response(projects, selection)
     return projects
 
 
+@router.get("/summary", response_model=ProjectPage)
+async def get_projects_summary(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    include: Optional[str] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db),
+) -> Any:
+    """Lister les projets de l'utilisateur courant, du plus récent au plus ancien, sans leurs détails.
+
+    La pagination se fait par curseur sur `(created_at, id)` : passer `next_cursor` pour obtenir la page suivante.
+    Les étapes ne sont chargées (en une seule requête supplémentaire) qu'avec `include=steps`.
+    """
+    includes = {name.strip() for name in include.split(",") if name.strip()} if include else set()
+    if includes - PROJECT_SUMMARY_INCLUDES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Inclusions possibles: {', '.join(sorted(PROJECT_SUMMARY_INCLUDES))}",
+        )
+
+    query = (
+        select(Project)
+        .where(Project.user_id == current_user.id)
+        .order_by(Project.created_at.desc(), Project.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        query = query.where(tuple_(Project.created_at, Project.id) < tuple_(*decode_cursor(cursor)))
+    if "steps" in includes:
+        query = query.options(selectinload(Project.steps))
+
+    result = await db.execute(query)
+    projects = result.scalars().all()
+
+    # Une ligne de plus que la page indique qu'il reste des projets
+    next_cursor = None
+    if len(projects) > limit:
+        projects = projects[:limit]
+        next_cursor = encode_cursor(projects[-1].created_at, projects[-1].id)
+
+    return {"items": projects, "next_cursor": next_cursor}
+
+
+@router.get("/dashboard", response_model=ProjectDashboard)
+async def get_projects_dashboard(
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db),
+) -> Any:
+    """Récupérer l'avancement des projets de l'utilisateur courant, sans charger leurs étapes."""
+    result = await db.execute(
+        select(
+            Project.id,
+            Project.title,
+            Project.status_project_id,
+            Project.created_at,
+            Project.progress,
+            Project.total_steps,
+            Project.completed_steps,
+        )
+        .where(Project.user_id == current_user.id)
+        .order_by(Project.created_at.desc(), Project.id.desc())
+    )
+    projects = result.mappings().all()
+
+    return {
+        "projects": projects,
+        "total_steps": sum(project["total_steps"] for project in projects),
+        "completed_steps": sum(project["completed_steps"] for project in projects),
+    }
+
+
 @router.post("/", response_model=ProjectWithDetails, status_code=status.HTTP_201_CREATED)
 async def create_project(
     project: ProjectCreate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
@@ -60,44 +219,21 @@ async def create_project(
     if not current_user.has_permission("CreateProject"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas le droit de créer un projet")
 
-    # Vérifier si l'utilisateur a déjà atteint la limite de 5 projets
-    projects_count = await db.execute(select(Project).where(Project.user_id == current_user.id))
-    projects = projects_count.scalars().all()
+    # Réserver un projet sur le quota de l'utilisateur (libéré par le rollback si la création échoue)
+    await PROJECT_QUOTA.acquire(db, principal_from_user(current_user))
 
-    if len(projects) >= 5 and not current_user.has_permission("CreateMoreThanFiveProjects"):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Vous avez déjà atteint le nombre maximum de projets"
-        )
+    # Vérifier le statut, la ville et la devise dans le cache des données de référence
+    references = await reference_cache.resolve(db, project.status_project_id, project.city_id, project.currency_id)
+    missing = references.missing(project.status_project_id, project.city_id, project.currency_id)
 
-    # Vérifier si le statut de projet existe
-    status_project_result = await db.execute(select(StatusProject).where(StatusProject.id == project.status_project_id))
-    status_project = status_project_result.scalar_one_or_none()
-
-    if not status_project:
+    if "status_project" in missing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Le statut de projet spécifié n'existe pas")
 
-    # Vérifier si la ville existe (si spécifiée)
-    if project.city_id:
-        city_result = await db.execute(select(City).where(City.id == project.city_id))
-        city = city_result.scalar_one_or_none()
-
-        if not city:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La ville spécifiée n'existe pas")
-
-    # Vérifier si la devise existe (si spécifiée)
-    if project.currency_id:
-        currency_result = await db.execute(select(Currency).where(Currency.id == project.currency_id))
-        currency = currency_result.scalar_one_or_none()
+    if "city" in missing:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La ville spécifiée n'existe pas")
 
-        if not currency:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La devise spécifiée n'existe pas")
-
-    # Vérifier si un projet avec le même titre existe déjà pour cet utilisateur
-    existing_project = await db.execute(
-        select(Project).where(Project.title == project.title, Project.user_id == current_user.id)
-    )
-    if existing_project.scalar_one_or_none():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Vous avez déjà un projet avec ce titre")
+    if "currency" in missing:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La devise spécifiée n'existe pas")
 
     # Créer le projet
     db_project = Project(
@@ -112,43 +248,44 @@ async def create_project(
         end_at=project.end_at,
     )
 
-    # Ajouter le projet à la base de données
+    # Ajouter le projet à la base de données (INSERT ... RETURNING id, puis COMMIT) ; l'unicité du titre pour
+    # l'utilisateur est garantie par la contrainte `_title_project_user_uc`
     db.add(db_project)
-    await db.commit()
-    await db.refresh(db_project)
-
-    # Récupérer le projet avec tous ses détails
-    project_result = await db.execute(
-        select(Project)
-        .options(
-            joinedload(Project.status_project),
-            joinedload(Project.city),
-            joinedload(Project.currency),
-            joinedload(Project.steps),
-        )
-        .where(Project.id == db_project.id)
-    )
+    try:
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        if not violates_unique_constraint(exc, Project.__table__, "_title_project_user_uc"):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Vous avez déjà un projet avec ce titre"
+        ) from None
 
-    return project_result.scalar_one()
+    # Construire la réponse sans relire le projet : un nouveau projet n'a pas encore d'étapes
+    return await project_details(db, db_project, steps=[])
 
 
 @router.get("/{project_id}", response_model=ProjectWithDetails)
 async def get_project(
-    project_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    project_id: int,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
-    """Récupérer un projet par son ID."""
+    """Récupérer un projet par son ID.
+
+    `fields` et `expand` restreignent la réponse aux champs et relations listés (voir immo.fieldsets).
+    """
+    selection = PROJECT_FIELDSET.select(fields, expand)
+
     # Récupérer le projet avec ses détails
     project_result = await db.execute(
         select(Project)
-        .options(
-            joinedload(Project.status_project),
-            joinedload(Project.city),
-            joinedload(Project.currency),
-            joinedload(Project.steps),
-        )
+        .options(*(PROJECT_FIELDSET.options(selection) if selection else project_details_options()))
         .where(Project.id == project_id)
     )
-    project = project_result.scalar_one_or_none()
+    project = project_result.unique().scalar_one_or_none()
 
     # Vérifier si le projet existe
     if not project:
@@ -158,6 +295,8 @@ async def get_project(
     if project.user_id != current_user.id and not current_user.has_permission("ReadProject"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas le droit de voir ce projet")
 
+    if selection:
+        return PROJECT_FIELDSET.response(project, selection)
     return project
 
 
@@ -169,9 +308,9 @@ async def update_project(
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """Mettre à jour un projet."""
-    # Récupérer le projet
+    # Récupérer le projet et ses étapes (nécessaires à la réponse)
     project_result = await db.execute(
-        select(Project).options(joinedload(Project.steps)).where(Project.id == project_id)
+        select(Project).options(selectinload(Project.steps)).where(Project.id == project_id)
     )
     project = project_result.scalar_one_or_none()
 
@@ -202,8 +341,7 @@ async def update_project(
             )
 
     # Vérifier que le nouveau budget est supérieur ou égal au budget déjà alloué
-    allocated_budget = sum(step.budget for step in project.steps)
-    if project_update.budget < allocated_budget:
+    if project_update.budget < project.allocated_budget:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Le nouveau budget doit être supérieur ou égal au budget déjà alloué",
@@ -220,21 +358,9 @@ async def update_project(
     project.end_at = project_update.end_at
 
     await db.commit()
-    await db.refresh(project)
 
-    # Récupérer le projet mis à jour avec tous ses détails
-    updated_project_result = await db.execute(
-        select(Project)
-        .options(
-            joinedload(Project.status_project),
-            joinedload(Project.city),
-            joinedload(Project.currency),
-            joinedload(Project.steps),
-        )
-        .where(Project.id == project_id)
-    )
-
-    return updated_project_result.scalar_one()
+    # Construire la réponse à partir des valeurs déjà connues, sans relire le projet
+    return await project_details(db, project, steps=project.steps)
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -256,16 +382,22 @@ async def delete_project(
             status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas le droit de supprimer ce projet"
         )
 
-    # Supprimer le projet
+    # Supprimer le projet et le libérer du quota de son propriétaire
     await db.delete(project)
+    await PROJECT_QUOTA.release(db, project.user_id)
     await db.commit()
 
 
 @router.get("/{project_id}/steps", response_model=List[StepInDB])
 async def get_project_steps(
-    project_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    project_id: int,
+    fields: Optional[str] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
-    """Récupérer toutes les étapes d'un projet."""
+    """Récupérer toutes les étapes d'un projet (restreintes aux champs listés dans `fields`, s'il est fourni)."""
+    selection = STEP_FIELDSET.select(fields)
+
     # Récupérer le projet
     project_result = await db.execute(select(Project).where(Project.id == project_id))
     project = project_result.scalar_one_or_none()
@@ -281,9 +413,14 @@ async def get_project_steps(
         )
 
     # Récupérer les étapes du projet
-    steps_result = await db.execute(select(Step).where(Step.project_id == project_id))
+    query = select(Step).where(Step.project_id == project_id).order_by(Step.rank)
+    if selection:
+        query = query.options(*STEP_FIELDSET.options(selection))
+    steps_result = await db.execute(query)
     steps = steps_result.scalars().all()
 
+    if selection:
+        return STEP_FIELDSET.response(steps, selection)
     return steps
 
 
@@ -295,10 +432,8 @@ async def create_project_step(
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """Créer une nouvelle étape pour un projet."""
-    # Récupérer le projet
-    project_result = await db.execute(
-        select(Project).options(joinedload(Project.steps)).where(Project.id == project_id)
-    )
+    # Récupérer le projet, verrouillé pour sérialiser les renumérotations et les contrôles de budget
+    project_result = await db.execute(select(Project).where(Project.id == project_id).with_for_update())
     project = project_result.scalar_one_or_none()
 
     # Vérifier si le projet existe
@@ -321,7 +456,10 @@ async def create_project_step(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ce projet a déjà une étape avec ce titre")
 
     # Vérifier si le numéro d'étape est valide
-    if step.number > len(project.steps) + 1:
+    if step.number < 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Le numéro de l'étape doit être positif")
+
+    if step.number > project.total_steps + 1:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Le numéro de l'étape est supérieur au nombre d'étapes du projet",
@@ -334,41 +472,182 @@ async def create_project_step(
             detail="Le budget de l'étape est supérieur au budget non alloué du projet",
         )
 
-    # Mettre à jour les numéros d'étapes existantes si nécessaire
-    for existing_step in project.steps:
-        if existing_step.number >= step.number:
-            existing_step.number += 1
-
-    # Créer l'étape
+    # Créer l'étape, avec un rang qui la place au numéro demandé
     db_step = Step(
         title=step.title,
         description=step.description,
-        number=step.number,
+        rank=await rank_for_position(db, project_id, step.number),
         budget=step.budget,
+        progress=step.progress,
         project_id=project_id,
         creator_id=current_user.id,
         begin_at=step.begin_at,
         end_at=step.end_at,
     )
 
-    # Ajouter l'étape à la base de données
+    # Ajouter l'étape à la base de données et reporter sa contribution sur le projet
     db.add(db_step)
-    await db.commit()
-
-    # Mettre à jour les étapes existantes
-    for existing_step in project.steps:
-        if existing_step.id != db_step.id and existing_step.number >= step.number:
-            await db.execute(update(Step).where(Step.id == existing_step.id).values(number=existing_step.number))
-
-    await db.commit()
+    await adjust_project_aggregates(db, project_id, StepContribution.of(step.budget, step.progress))
+    await commit_step_changes(db)
     await db.refresh(db_step)
 
     return db_step
 
 
+@router.post("/{project_id}/steps/batch", response_model=List[StepInDB], status_code=status.HTTP_201_CREATED)
+async def create_project_steps(
+    project_id: int,
+    batch: StepBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """Créer plusieurs étapes pour un projet, en une seule transaction.
+
+    Le lot est validé en mémoire contre une seule photographie des étapes du projet, puis inséré par une seule
+    instruction `INSERT` : soit toutes les étapes sont créées, soit aucune.
+    """
+    # Récupérer le projet, verrouillé pour sérialiser les renumérotations et les contrôles de budget
+    project_result = await db.execute(select(Project).where(Project.id == project_id).with_for_update())
+    project = project_result.scalar_one_or_none()
+
+    # Vérifier si le projet existe
+    if not project:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Projet non trouvé")
+
+    # Vérifier si le projet est terminé
+    if project.status_project_id == 3:  # ID du statut "Terminé"
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Le projet est terminé")
+
+    # Vérifier si l'utilisateur a le droit de créer une étape pour ce projet
+    if project.user_id != current_user.id and not current_user.has_permission("CreateOtherStep"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas le droit de créer une étape pour ce projet"
+        )
+
+    # Photographie des étapes existantes
+    existing_result = await db.execute(
+        select(Step.title, Step.rank).where(Step.project_id == project_id).order_by(Step.rank)
+    )
+    existing_steps = existing_result.all()
+    titles = {existing.title for existing in existing_steps}
+
+    # Valider chaque étape du lot, en tenant compte de celles qui la précèdent
+    for index, step in enumerate(batch.steps):
+        prefix = f"Étape {index + 1}"
+
+        if step.title in titles:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=f"{prefix}: ce projet a déjà une étape avec ce titre"
+            )
+        titles.add(step.title)
+
+        if step.number < 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=f"{prefix}: le numéro de l'étape doit être positif"
+            )
+
+        if step.number > len(existing_steps) + index + 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{prefix}: le numéro de l'étape est supérieur au nombre d'étapes du projet",
+            )
+
+    # Vérifier si le budget du lot n'est pas supérieur au budget non alloué du projet
+    batch_budget = sum(step.budget for step in batch.steps)
+    if batch_budget > project.unallocated_budget:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Le budget des étapes est supérieur au budget non alloué du projet",
+        )
+
+    # Placer les nouvelles étapes dans les écarts entre rangs, ou redistribuer les rangs s'ils sont trop serrés
+    positions = [step.number for step in batch.steps]
+    ranks = plan_insertions([existing.rank for existing in existing_steps], positions)
+    if ranks is None:
+        await rebalance(db, project_id)
+        ranks = plan_insertions([(index + 1) * RANK_GAP for index in range(len(existing_steps))], positions)
+
+    # Insérer toutes les étapes en une seule instruction
+    rows = [
+        {
+            "title": step.title,
+            "description": step.description,
+            "rank": rank,
+            "budget": step.budget,
+            "progress": step.progress,
+            "project_id": project_id,
+            "creator_id": current_user.id,
+            "begin_at": step.begin_at,
+            "end_at": step.end_at,
+        }
+        for step, rank in zip(batch.steps, ranks)
+    ]
+    insert_result = await db.execute(insert(Step).returning(Step.id, sort_by_parameter_order=True), rows)
+    step_ids = insert_result.scalars().all()
+    contribution = sum((StepContribution.of(step.budget, step.progress) for step in batch.steps), StepContribution())
+    await adjust_project_aggregates(db, project_id, contribution)
+    await commit_step_changes(db)
+
+    # Récupérer les étapes créées dans l'ordre du projet
+    steps_result = await db.execute(select(Step).where(Step.id.in_(step_ids)).order_by(Step.rank))
+
+    return steps_result.scalars().all()
+
+
+@router.patch("/{project_id}/steps/order", response_model=List[StepInDB])
+async def reorder_project_steps(
+    project_id: int,
+    step_order: StepOrderUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """Réordonner tout ou partie des étapes d'un projet."""
+    # Récupérer le projet, verrouillé pour sérialiser les réordonnancements
+    await lock_project(db, project_id)
+    project_result = await db.execute(select(Project).where(Project.id == project_id))
+    project = project_result.scalar_one_or_none()
+
+    # Vérifier si le projet existe
+    if not project:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Projet non trouvé")
+
+    # Vérifier si l'utilisateur a le droit de modifier les étapes de ce projet
+    if project.user_id != current_user.id and not current_user.has_permission("UpdateStep"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas le droit de modifier les étapes de ce projet"
+        )
+
+    # Vérifier que chaque étape n'est listée qu'une fois
+    if len(set(step_order.step_ids)) != len(step_order.step_ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Une étape est listée plusieurs fois")
+
+    # Vérifier que toutes les étapes appartiennent au projet
+    steps_result = await db.execute(
+        select(Step.id).where(Step.project_id == project_id, Step.id.in_(step_order.step_ids))
+    )
+    if len(steps_result.scalars().all()) != len(step_order.step_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Certaines étapes n'appartiennent pas au projet spécifié"
+        )
+
+    # Appliquer le nouvel ordre en une seule instruction
+    await reorder_steps(db, project_id, step_order.step_ids)
+    await commit_step_changes(db)
+
+    # Récupérer les étapes dans leur nouvel ordre
+    steps_result = await db.execute(
+        select(Step).where(Step.project_id == project_id).order_by(Step.rank).execution_options(populate_existing=True)
+    )
+
+    return steps_result.scalars().all()
+
+
 @router.get("/{project_id}/steps/{step_id}", response_model=StepInDB)
 async def get_project_step(
-    project_id: int, step_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    project_id: int,
+    step_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """Récupérer une étape d'un projet."""
     # Récupérer l'étape
@@ -403,8 +682,17 @@ async def update_project_step(
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """Mettre à jour une étape d'un projet."""
+    # Verrouiller le projet avant de lire l'étape et le projet : les renumérotations et les contrôles de budget sont
+    # sérialisés, et portent sur des valeurs lues après l'obtention du verrou
+    await lock_project(db, project_id)
+
     # Récupérer l'étape
-    step_result = await db.execute(select(Step).options(joinedload(Step.project)).where(Step.id == step_id))
+    step_result = await db.execute(
+        select(Step)
+        .options(joinedload(Step.project))
+        .where(Step.id == step_id)
+        .execution_options(populate_existing=True)
+    )
     step = step_result.scalar_one_or_none()
 
     # Vérifier si l'étape existe
@@ -429,11 +717,7 @@ async def update_project_step(
             status_code=status.HTTP_400_BAD_REQUEST, detail="L'identifiant de l'étape ne correspond pas"
         )
 
-    # Récupérer le projet
-    project_result = await db.execute(
-        select(Project).options(joinedload(Project.steps)).where(Project.id == project_id)
-    )
-    project = project_result.scalar_one()
+    project = step.project
 
     # Vérifier si une autre étape du projet a le même titre
     if step_update.title != step.title:
@@ -453,7 +737,10 @@ async def update_project_step(
         )
 
     # Vérifier si le nouveau numéro est valide
-    if step_update.number > len(project.steps):
+    if step_update.number < 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Le numéro de l'étape doit être positif")
+
+    if step_update.number > project.total_steps:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Le nouveau numéro doit être inférieur ou égal au nombre d'étapes du projet",
@@ -464,30 +751,28 @@ async def update_project_step(
     new_number = step_update.number
 
     if old_number != new_number:
-        # Mettre à jour les numéros des autres étapes
-        for other_step in project.steps:
-            if other_step.id != step_id:
-                if old_number < new_number and other_step.number > old_number and other_step.number <= new_number:
-                    other_step.number -= 1
-                elif old_number > new_number and other_step.number >= new_number and other_step.number < old_number:
-                    other_step.number += 1
+        # Seule l'étape déplacée change de rang
+        step.rank = await rank_for_position(db, project_id, new_number, exclude_step_id=step_id)
+
+    # Avancement omis : conserver celui de l'étape
+    progress = step_update.progress if step_update.progress is not None else step.progress
+
+    # Reporter la variation de la contribution de l'étape sur le projet
+    await adjust_project_aggregates(
+        db,
+        project_id,
+        StepContribution.of(step_update.budget, progress) - StepContribution.of(step.budget, step.progress),
+    )
 
     # Mettre à jour l'étape
     step.title = step_update.title
     step.description = step_update.description
-    step.number = new_number
     step.budget = step_update.budget
+    step.progress = progress
     step.begin_at = step_update.begin_at
     step.end_at = step_update.end_at
 
-    await db.commit()
-
-    # Mettre à jour les numéros des autres étapes en base de données
-    for other_step in project.steps:
-        if other_step.id != step_id:
-            await db.execute(update(Step).where(Step.id == other_step.id).values(number=other_step.number))
-
-    await db.commit()
+    await commit_step_changes(db)
     await db.refresh(step)
 
     return step
@@ -495,11 +780,22 @@ async def update_project_step(
 
 @router.delete("/{project_id}/steps/{step_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project_step(
-    project_id: int, step_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    project_id: int,
+    step_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> None:
     """Supprimer une étape d'un projet."""
+    # Verrouiller le projet avant de lire l'étape : la contribution retirée est celle de l'étape à jour
+    await lock_project(db, project_id)
+
     # Récupérer l'étape
-    step_result = await db.execute(select(Step).options(joinedload(Step.project)).where(Step.id == step_id))
+    step_result = await db.execute(
+        select(Step)
+        .options(joinedload(Step.project))
+        .where(Step.id == step_id)
+        .execution_options(populate_existing=True)
+    )
     step = step_result.scalar_one_or_none()
 
     # Vérifier si l'étape existe
@@ -522,17 +818,10 @@ async def delete_project_step(
     if step.project.status_project_id == 3:  # ID du statut "Terminé"
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Le projet est terminé")
 
-    # Récupérer le numéro de l'étape avant de la supprimer
-    step_number = step.number
-
-    # Supprimer l'étape
+    # Supprimer l'étape (les numéros des suivantes, dérivés de leur rang, se décalent d'eux-mêmes)
+    # et retirer sa contribution du projet
     await db.delete(step)
-    await db.commit()
-
-    # Mettre à jour les numéros des étapes suivantes
-    steps_to_update = await db.execute(select(Step).where(Step.project_id == project_id, Step.number > step_number))
-
-    for s in steps_to_update.scalars().all():
-        s.number -= 1
-
+    await adjust_project_aggregates(
+        db, project_id, StepContribution() - StepContribution.of(step.budget, step.progress)
+    )
     await db.commit()
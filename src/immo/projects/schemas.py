@@ -3,7 +3,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
 
 from immo.utils.schemas import CityInDB, CurrencyInDB, StatusProjectInDB
 
@@ -16,6 +16,7 @@ class StepBase(BaseModel):
     description: str = Field(..., min_length=3, max_length=1000)
     number: int
     budget: int = Field(..., ge=0)
+    progress: int = Field(0, ge=0, le=100)
     begin_at: Optional[datetime] = None
     end_at: Optional[datetime] = None
 
@@ -26,10 +27,34 @@ class StepCreate(StepBase):
     pass
 
 
+class StepBatchCreate(BaseModel):
+    """Schéma pour la création d'un lot d'étapes.
+
+    Les étapes sont insérées dans l'ordre de la liste, comme si elles étaient créées une à une : le numéro de chacune
+    tient compte des étapes qui la précèdent dans le lot.
+    """
+
+    steps: List[StepCreate] = Field(..., min_length=1, max_length=100)
+
+
 class StepUpdate(StepBase):
-    """Schéma pour la mise à jour d'une étape."""
+    """Schéma pour la mise à jour d'une étape.
+
+    L'avancement omis (`None`) reste inchangé.
+    """
 
     id: int
+    progress: Optional[int] = Field(None, ge=0, le=100)
+
+
+class StepOrderUpdate(BaseModel):
+    """Schéma pour le réordonnancement des étapes d'un projet.
+
+    Les étapes listées sont réparties, dans l'ordre donné, sur les positions qu'elles occupent actuellement ; la
+    liste complète des étapes définit l'ordre total du projet.
+    """
+
+    step_ids: List[int] = Field(..., min_length=1)
 
 
 class StepInDB(StepBase):
@@ -39,10 +64,8 @@ class StepInDB(StepBase):
     project_id: int
     creator_id: int
     created_at: datetime
-    progress: int = 0
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Schémas pour les projets
@@ -64,10 +87,11 @@ class ProjectCreate(ProjectBase):
     currency_id: Optional[int] = None
 
     @field_validator("end_at")
-    def validate_dates(cls, v, values):
+    def validate_dates(cls, v, info: ValidationInfo):
         """Validation des dates."""
-        if "begin_at" in values and values["begin_at"] is not None and v is not None:
-            if values["begin_at"] > v:
+        begin_at = info.data.get("begin_at")
+        if begin_at is not None and v is not None:
+            if begin_at > v:
                 raise ValueError("La date de début doit être antérieure à la date de fin")
         return v
 
@@ -88,10 +112,12 @@ class ProjectInDB(ProjectBase):
     currency_id: Optional[int] = None
     created_at: datetime
     progress: int = 0
+    total_steps: int = 0
+    completed_steps: int = 0
+    allocated_budget: int = 0
     unallocated_budget: int = 0
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ProjectWithDetails(ProjectInDB):
@@ -101,3 +127,38 @@ class ProjectWithDetails(ProjectInDB):
     city: Optional[CityInDB] = None
     currency: Optional[CurrencyInDB] = None
     steps: List[StepInDB] = []
+
+
+class ProjectProgress(BaseModel):
+    """Schéma pour l'avancement d'un projet."""
+
+    id: int
+    title: str
+    status_project_id: int
+    created_at: datetime
+    progress: int = 0
+    total_steps: int = 0
+    completed_steps: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ProjectDashboard(BaseModel):
+    """Schéma pour le tableau de bord des projets de l'utilisateur."""
+
+    projects: List[ProjectProgress] = []
+    total_steps: int = 0
+    completed_steps: int = 0
+
+
+class ProjectSummary(ProjectInDB):
+    """Schéma pour un projet dans une liste, avec ses étapes uniquement sur demande."""
+
+    steps: Optional[List[StepInDB]] = Field(None, validation_alias="loaded_steps")
+
+
+class ProjectPage(BaseModel):
+    """Schéma pour une page de projets, avec le curseur de la page suivante (None s'il n'y en a pas)."""
+
+    items: List[ProjectSummary]
+    next_cursor: Optional[str] = None
@@ -0,0 +1 @@
+"""Package pour la gestion des quotas."""
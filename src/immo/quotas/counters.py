@@ -0,0 +1,133 @@
+"""Quotas de ressources par utilisateur.
+
+Chaque ressource soumise à quota (projets, services, ...) est déclarée par un `Quota`. La limite d'un utilisateur est
+la plus généreuse de celles de ses rôles, enregistrées dans `role_quotas` (un rôle sans limite enregistrée accorde la
+limite par défaut de la ressource, une limite nulle lève toute limite) ; la permission `unlimited_permission` lève
+elle aussi toute limite.
+
+Le nombre de ressources détenues par chaque utilisateur est tenu dans un compteur (`quota_usages`), mis à jour dans la
+même transaction que la création ou la suppression de la ressource. La réservation est un seul `UPDATE ... SET used =
+used + 1 WHERE used < :limit` : la ligne du compteur reste verrouillée jusqu'à la fin de la transaction, si bien que
+deux créations concurrentes ne peuvent pas franchir ensemble la limite. Un compteur absent est initialisé par un
+`count(*)` des ressources de l'utilisateur ; supprimer un compteur suffit donc à le faire recalculer.
+"""
+
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from immo.quotas.models import QuotaUsage, RoleQuota
+from immo.users.permissions import Principal
+
+
+# Quotas déclarés, indexés par ressource
+QUOTAS: Dict[str, "Quota"] = {}
+
+
+class Quota:
+    """Quota d'une ressource détenue par les utilisateurs.
+
+    `model` est le modèle de la ressource et `owner_column` la colonne désignant son propriétaire ; `detail` est le
+    message de l'erreur 403 renvoyée lorsque la limite est atteinte.
+    """
+
+    def __init__(
+        self,
+        resource: str,
+        model: Any,
+        detail: str,
+        default_limit: Optional[int] = 5,
+        unlimited_permission: Optional[str] = None,
+        owner_column: str = "user_id",
+    ) -> None:
+        self.resource = resource
+        self.model = model
+        self.detail = detail
+        self.default_limit = default_limit
+        self.unlimited_permission = unlimited_permission
+        self.owner_column = owner_column
+        QUOTAS[resource] = self
+
+    async def limit_for(self, db: AsyncSession, principal: Principal) -> Optional[int]:
+        """Limite de l'utilisateur (None : sans limite)."""
+        if self.unlimited_permission and principal.has_permission(self.unlimited_permission):
+            return None
+
+        if not principal.role_ids:
+            return self.default_limit
+
+        result = await db.execute(
+            select(RoleQuota.role_id, RoleQuota.limit).where(
+                RoleQuota.resource == self.resource, RoleQuota.role_id.in_(principal.role_ids)
+            )
+        )
+        role_limits = dict(result.tuples().all())
+        limits = [role_limits.get(role_id, self.default_limit) for role_id in principal.role_ids]
+
+        return None if None in limits else max(limits)
+
+    async def count(self, db: AsyncSession, user_id: int) -> int:
+        """Nombre exact de ressources détenues par l'utilisateur."""
+        result = await db.execute(
+            select(func.count()).select_from(self.model).where(getattr(self.model, self.owner_column) == user_id)
+        )
+        return result.scalar_one()
+
+    async def used(self, db: AsyncSession, user_id: int) -> int:
+        """Nombre de ressources détenues par l'utilisateur, d'après son compteur s'il existe."""
+        result = await db.execute(
+            select(QuotaUsage.used).where(QuotaUsage.user_id == user_id, QuotaUsage.resource == self.resource)
+        )
+        used = result.scalar_one_or_none()
+        return used if used is not None else await self.count(db, user_id)
+
+    async def acquire(self, db: AsyncSession, principal: Principal) -> None:
+        """Réserver une ressource pour l'utilisateur, avant de la créer dans la même transaction.
+
+        Lève une erreur 403 si l'utilisateur a atteint sa limite.
+        """
+        limit = await self.limit_for(db, principal)
+        if await self._increment(db, principal.id, limit) or limit is None:
+            # Sans limite, un compteur absent n'est pas initialisé : il le sera s'il devient utile
+            return
+
+        # Compteur absent ou limite atteinte : initialiser le compteur s'il n'existe pas, puis réessayer
+        await self._initialize(db, principal.id)
+        if not await self._increment(db, principal.id, limit):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=self.detail)
+
+    async def release(self, db: AsyncSession, user_id: int) -> None:
+        """Libérer une ressource de l'utilisateur, dans la transaction qui la supprime."""
+        await db.execute(
+            update(QuotaUsage)
+            .where(QuotaUsage.user_id == user_id, QuotaUsage.resource == self.resource, QuotaUsage.used > 0)
+            .values(used=QuotaUsage.used - 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def _increment(self, db: AsyncSession, user_id: int, limit: Optional[int]) -> bool:
+        """Incrémenter le compteur s'il existe et n'a pas atteint la limite."""
+        query = update(QuotaUsage).where(QuotaUsage.user_id == user_id, QuotaUsage.resource == self.resource)
+        if limit is not None:
+            query = query.where(QuotaUsage.used < limit)
+
+        result = await db.execute(query.values(used=QuotaUsage.used + 1).execution_options(synchronize_session=False))
+        return result.rowcount > 0
+
+    async def _initialize(self, db: AsyncSession, user_id: int) -> None:
+        """Créer le compteur de l'utilisateur à partir de ses ressources existantes, s'il n'existe pas."""
+        used = (
+            select(func.count())
+            .select_from(self.model)
+            .where(getattr(self.model, self.owner_column) == user_id)
+            .scalar_subquery()
+        )
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(QuotaUsage).values(user_id=user_id, resource=self.resource, used=used))
+        except IntegrityError:
+            # Le compteur existe déjà (limite atteinte, ou créé entre-temps par une requête concurrente)
+            pass
@@ -0,0 +1,35 @@
+"""Modèles de données pour les quotas."""
+
+from sqlalchemy import Column, ForeignKey, Integer, String, UniqueConstraint
+
+from immo.extensions import Base
+
+
+class RoleQuota(Base):
+    """Limite d'une ressource accordée par un rôle (sans limite si `limit` est nul)."""
+
+    __tablename__ = "role_quotas"
+    __table_args__ = (UniqueConstraint("role_id", "resource", name="_role_resource_quota_uc"),)
+
+    id = Column(Integer, primary_key=True)
+    role_id = Column(Integer, ForeignKey("roles.id", ondelete="CASCADE"), nullable=False)
+    resource = Column(String(64), nullable=False)
+    limit = Column(Integer, nullable=True)
+
+    def __repr__(self) -> str:
+        """Représentation de l'objet."""
+        return f"<RoleQuota {self.resource}: {self.limit}>"
+
+
+class QuotaUsage(Base):
+    """Compteur des ressources détenues par un utilisateur."""
+
+    __tablename__ = "quota_usages"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    resource = Column(String(64), primary_key=True)
+    used = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        """Représentation de l'objet."""
+        return f"<QuotaUsage {self.resource}: {self.used}>"
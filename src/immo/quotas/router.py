@@ -0,0 +1,137 @@
+"""Router pour les quotas."""
+
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from immo.extensions import get_db
+from immo.quotas.counters import QUOTAS
+from immo.quotas.models import RoleQuota
+from immo.quotas.schemas import QuotaStatus, RoleQuotaInDB, RoleQuotaUpdate
+from immo.users.models import Role, User
+from immo.users.permissions import Principal
+from immo.users.router import get_current_principal, get_current_user
+
+
+router = APIRouter()
+
+
+def check_resource(resource: str) -> None:
+    """Vérifier que la ressource est soumise à un quota."""
+    if resource not in QUOTAS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Quota inconnu: {resource}. Quotas possibles: {', '.join(QUOTAS)}",
+        )
+
+
+async def get_role_or_404(db: AsyncSession, role_id: int) -> Role:
+    """Récupérer un rôle, ou lever une erreur 404."""
+    role_result = await db.execute(select(Role).where(Role.id == role_id))
+    role = role_result.scalar_one_or_none()
+
+    if not role:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rôle non trouvé")
+
+    return role
+
+
+@router.get("/", response_model=List[QuotaStatus])
+async def get_my_quotas(
+    current_user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Récupérer la consommation des quotas de l'utilisateur courant."""
+    return [
+        QuotaStatus(
+            resource=resource,
+            used=await quota.used(db, current_user.id),
+            limit=await quota.limit_for(db, current_user),
+        )
+        for resource, quota in QUOTAS.items()
+    ]
+
+
+@router.get("/roles/{role_id}", response_model=List[RoleQuotaInDB])
+async def get_role_quotas(
+    role_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Récupérer les limites accordées par un rôle (y compris les limites par défaut)."""
+    # Vérifier si l'utilisateur a le droit de voir ce rôle
+    if not current_user.has_permission("ReadRole"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'êtes pas autorisé à effectuer cette action"
+        )
+
+    await get_role_or_404(db, role_id)
+
+    quotas_result = await db.execute(select(RoleQuota.resource, RoleQuota.limit).where(RoleQuota.role_id == role_id))
+    limits = dict(quotas_result.tuples().all())
+
+    return [
+        RoleQuotaInDB(role_id=role_id, resource=resource, limit=limits.get(resource, quota.default_limit))
+        for resource, quota in QUOTAS.items()
+    ]
+
+
+@router.put("/roles/{role_id}/{resource}", response_model=RoleQuotaInDB)
+async def set_role_quota(
+    role_id: int,
+    resource: str,
+    role_quota: RoleQuotaUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """Définir la limite accordée par un rôle pour une ressource."""
+    # Vérifier si l'utilisateur a le droit de modifier ce rôle
+    if not current_user.has_permission("UpdateRole"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'êtes pas autorisé à effectuer cette action"
+        )
+
+    # Seul le super administrateur peut modifier les rôles ADMIN et SUPERADMIN
+    if role_id in [1, 2] and not current_user.is_super_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'êtes pas autorisé à modifier ce rôle")
+
+    check_resource(resource)
+    await get_role_or_404(db, role_id)
+
+    quota_result = await db.execute(
+        select(RoleQuota).where(RoleQuota.role_id == role_id, RoleQuota.resource == resource)
+    )
+    db_quota = quota_result.scalar_one_or_none()
+
+    if db_quota:
+        db_quota.limit = role_quota.limit
+    else:
+        db_quota = RoleQuota(role_id=role_id, resource=resource, limit=role_quota.limit)
+        db.add(db_quota)
+
+    await db.commit()
+
+    return db_quota
+
+
+@router.delete("/roles/{role_id}/{resource}", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_role_quota(
+    role_id: int,
+    resource: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> None:
+    """Rétablir la limite par défaut d'une ressource pour un rôle."""
+    # Vérifier si l'utilisateur a le droit de modifier ce rôle
+    if not current_user.has_permission("UpdateRole"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'êtes pas autorisé à effectuer cette action"
+        )
+
+    # Seul le super administrateur peut modifier les rôles ADMIN et SUPERADMIN
+    if role_id in [1, 2] and not current_user.is_super_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'êtes pas autorisé à modifier ce rôle")
+
+    check_resource(resource)
+
+    await db.execute(delete(RoleQuota).where(RoleQuota.role_id == role_id, RoleQuota.resource == resource))
+    await db.commit()
@@ -0,0 +1,28 @@
+"""Schémas Pydantic pour les quotas."""
+
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class RoleQuotaUpdate(BaseModel):
+    """Schéma pour la définition de la limite d'un rôle (nulle : sans limite)."""
+
+    limit: Optional[int] = Field(..., ge=0)
+
+
+class RoleQuotaInDB(RoleQuotaUpdate):
+    """Schéma pour la représentation de la limite d'un rôle en base de données."""
+
+    role_id: int
+    resource: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class QuotaStatus(BaseModel):
+    """Schéma pour la consommation d'un quota par l'utilisateur courant."""
+
+    resource: str
+    used: int
+    limit: Optional[int]
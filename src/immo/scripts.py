@@ -47,3 +47,75 @@ def run_server() -> None:
     """Run the fastapi server."""
     print("Running the fastapi server")
     subprocess.run(["uvicorn", "immo.interface:app", "--reload"], check=True)
+
+
+def run_password_calibration() -> None:
+    """Measure password hashing time and recommend PASSWORD_HASH_ROUNDS for a target latency."""
+    import argparse
+
+    from immo.config import settings
+    from immo.users.passwords import calibrate_rounds
+
+    parser = argparse.ArgumentParser(description=run_password_calibration.__doc__)
+    parser.add_argument("--scheme", default=settings.PASSWORD_HASH_SCHEME, help="passlib scheme to calibrate")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Maximum hashing time per password")
+    parser.add_argument("--samples", type=int, default=3, help="Measurements per cost value")
+    args = parser.parse_args()
+
+    print(f"Calibrating {args.scheme} for a target of {args.target_ms:.0f} ms")
+    rounds, measurements = calibrate_rounds(args.scheme, args.target_ms, args.samples)
+    for cost, elapsed in measurements:
+        print(f"  rounds={cost}: {elapsed:.1f} ms")
+
+    print("Recommended settings:")
+    print(f"  PASSWORD_HASH_SCHEME={args.scheme}")
+    print(f"  PASSWORD_HASH_ROUNDS={rounds}")
+
+
+def run_project_reconciliation() -> None:
+    """Recompute each project's step aggregates (budget, step counts, progress) and repair any drift."""
+    import argparse
+    import asyncio
+
+    from immo import extensions
+    from immo.projects.aggregates import reconcile_project_aggregates
+
+    parser = argparse.ArgumentParser(description=run_project_reconciliation.__doc__)
+    parser.add_argument("--dry-run", action="store_true", help="Report drifted projects without repairing them")
+    args = parser.parse_args()
+
+    async def reconcile() -> None:
+        await extensions.init_db()
+        async with extensions.async_session_maker() as db:
+            drifted = await reconcile_project_aggregates(db, dry_run=args.dry_run)
+            if not args.dry_run:
+                await db.commit()
+        await extensions.engine.dispose()
+
+        for project_id, changes in drifted:
+            details = ", ".join(f"{column} {stored} -> {actual}" for column, (stored, actual) in changes.items())
+            print(f"  project {project_id}: {details}")
+        action = "found" if args.dry_run else "repaired"
+        print(f"{len(drifted)} drifted project(s) {action}")
+
+    asyncio.run(reconcile())
+
+
+def run_static_precompression() -> None:
+    """Write .br/.gz siblings of the text static assets (CSS, JS, SVG) served by PrecompressedStaticFiles."""
+    import argparse
+
+    from immo.compression import brotli, precompress_static
+
+    parser = argparse.ArgumentParser(description=run_static_precompression.__doc__)
+    parser.add_argument("--directory", type=Path, default=path / "static", help="Static files directory")
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli is not installed (poetry install -E compression): writing gzip variants only")
+
+    results = precompress_static(args.directory)
+    for file_path, size, sizes in results:
+        variants = ", ".join(f"{encoding} {compressed}" for encoding, compressed in sizes.items()) or "not compressed"
+        print(f"  {file_path.relative_to(args.directory)}: {size} -> {variants}")
+    print(f"{len(results)} file(s) precompressed")
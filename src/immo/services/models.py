@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from immo.extensions import Base
@@ -12,6 +12,7 @@ class Service(Base):
     """Modèle de données pour les services."""
 
     __tablename__ = "services"
+    __table_args__ = (UniqueConstraint("title", "user_id", name="_title_service_user_uc"),)
 
     id = Column(Integer, primary_key=True)
     title = Column(String(64), index=True)
@@ -1,31 +1,56 @@
 """Router pour les services."""
 
-from typing import Any, List
+from typing import Any, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from immo.extensions import get_db
+from immo.extensions import get_db, get_read_db, violates_unique_constraint
+from immo.fieldsets import Fieldset
+from immo.quotas.counters import Quota
 from immo.services.models import Service
 from immo.services.schemas import ServiceCreate, ServiceInDB, ServiceUpdate
 from immo.users.models import User
-from immo.users.router import get_current_user
+from immo.users.permissions import Principal
+from immo.users.router import get_current_principal, get_current_user, principal_from_user
 
 
 router = APIRouter()
 
+# Champs des réponses partielles (paramètre `fields`)
+SERVICE_FIELDSET = Fieldset(Service, ServiceInDB, always=("id", "user_id"))
+
+# Quota de services par utilisateur (voir immo.quotas.counters)
+SERVICE_QUOTA = Quota(
+    "services",
+    Service,
+    detail="Vous avez déjà atteint le nombre maximum de services",
+    unlimited_permission="CreateMoreThanFiveServices",
+)
+
 
 @router.get("/", response_model=List[ServiceInDB])
 async def get_services(
-    skip: int = 0, limit: int = 100, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[str] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db),
 ) -> Any:
-    """Récupérer tous les services de l'utilisateur courant."""
+    """Récupérer tous les services de l'utilisateur courant (restreints aux champs listés dans `fields`)."""
+    selection = SERVICE_FIELDSET.select(fields)
+
     query = select(Service).where(Service.user_id == current_user.id).offset(skip).limit(limit)
+    if selection:
+        query = query.options(*SERVICE_FIELDSET.options(selection))
 
     result = await db.execute(query)
     services = result.scalars().all()
 
+    if selection:
+        return SERVICE_FIELDSET.response(services, selection)
     return services
 
 
@@ -40,42 +65,46 @@ async def create_service(
             status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas le droit de créer un service"
         )
 
-    # Vérifier si l'utilisateur a déjà atteint la limite de 5 services
-    services_count = await db.execute(select(Service).where(Service.user_id == current_user.id))
-    services = services_count.scalars().all()
-
-    if len(services) >= 5 and not current_user.has_permission("CreateMoreThanFiveServices"):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Vous avez déjà atteint le nombre maximum de services"
-        )
-
-    # Vérifier si un service avec le même titre existe déjà pour cet utilisateur
-    existing_service = await db.execute(
-        select(Service).where(Service.title == service.title, Service.user_id == current_user.id)
-    )
-    if existing_service.scalar_one_or_none():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Vous avez déjà un service avec ce titre")
+    # Réserver un service sur le quota de l'utilisateur (libéré par le rollback si la création échoue)
+    await SERVICE_QUOTA.acquire(db, principal_from_user(current_user))
 
     # Créer le service
     db_service = Service(
         title=service.title, description=service.description, price=service.price, user_id=current_user.id
     )
 
-    # Ajouter le service à la base de données
+    # Ajouter le service à la base de données ; l'unicité du titre pour l'utilisateur est garantie par la contrainte
+    # `_title_service_user_uc`. Les valeurs par défaut (id, created_at) sont déjà connues après le flush : pas de
+    # relecture du service
     db.add(db_service)
-    await db.commit()
-    await db.refresh(db_service)
+    try:
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        if not violates_unique_constraint(exc, Service.__table__, "_title_service_user_uc"):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Vous avez déjà un service avec ce titre"
+        ) from None
 
     return db_service
 
 
 @router.get("/{service_id}", response_model=ServiceInDB)
 async def get_service(
-    service_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    service_id: int,
+    fields: Optional[str] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db),
 ) -> Any:
-    """Récupérer un service par son ID."""
+    """Récupérer un service par son ID (restreint aux champs listés dans `fields`, s'il est fourni)."""
+    selection = SERVICE_FIELDSET.select(fields)
+
     # Récupérer le service
-    service_result = await db.execute(select(Service).where(Service.id == service_id))
+    query = select(Service).where(Service.id == service_id)
+    if selection:
+        query = query.options(*SERVICE_FIELDSET.options(selection))
+    service_result = await db.execute(query)
     service = service_result.scalar_one_or_none()
 
     # Vérifier si le service existe
@@ -86,6 +115,8 @@ async def get_service(
     if service.user_id != current_user.id and not current_user.has_permission("ReadService"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas le droit de voir ce service")
 
+    if selection:
+        return SERVICE_FIELDSET.response(service, selection)
     return service
 
 
@@ -156,6 +187,7 @@ async def delete_service(
             status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas le droit de supprimer ce service"
         )
 
-    # Supprimer le service
+    # Supprimer le service et le libérer du quota de son propriétaire
     await db.delete(service)
+    await SERVICE_QUOTA.release(db, service.user_id)
     await db.commit()
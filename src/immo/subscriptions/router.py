@@ -7,7 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from immo.extensions import get_db
+from immo.extensions import get_db, get_read_db
 from immo.subscriptions.models import FreeSubscription, NonUserSubscription, ValidatedNonUserSubscription
 from immo.subscriptions.schemas import (
     FreeSubscriptionCreate,
@@ -18,7 +18,8 @@ from immo.subscriptions.schemas import (
     ValidatedNonUserSubscriptionInDB,
 )
 from immo.users.models import User
-from immo.users.router import get_current_user
+from immo.users.permissions import Principal
+from immo.users.router import get_current_principal, get_current_user
 
 
 router = APIRouter()
@@ -50,7 +51,7 @@ async def create_non_user_subscription(
 
 @router.get("/non_user", response_model=list[NonUserSubscriptionInDB])
 async def get_non_user_subscriptions(
-    current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_read_db)
 ) -> Any:
     """Récupérer tous les abonnements des utilisateurs non enregistrés."""
     # Vérifier si l'utilisateur est administrateur
@@ -124,7 +125,7 @@ async def create_validated_non_user_subscription(
 
 @router.get("/validated_non_user", response_model=list[ValidatedNonUserSubscriptionInDB])
 async def get_validated_non_user_subscriptions(
-    current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_read_db)
 ) -> Any:
     """Récupérer tous les abonnements validés des utilisateurs non enregistrés."""
     # Vérifier si l'utilisateur est administrateur
@@ -142,7 +143,7 @@ async def get_validated_non_user_subscriptions(
 
 @router.get("/validated_non_user/{subscription_id}", response_model=ValidatedNonUserSubscriptionInDB)
 async def get_validated_non_user_subscription(
-    subscription_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    subscription_id: int, current_user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_db)
 ) -> Any:
     """Récupérer un abonnement validé d'utilisateur non enregistré par son ID."""
     # Vérifier si l'utilisateur est administrateur
@@ -280,7 +281,7 @@ async def create_free_subscription(subscription: FreeSubscriptionCreate, db: Asy
 
 @router.get("/free", response_model=list[FreeSubscriptionInDB])
 async def get_free_subscriptions(
-    current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_read_db)
 ) -> Any:
     """Récupérer tous les abonnements gratuits."""
     # Vérifier si l'utilisateur est administrateur
@@ -2,7 +2,7 @@
 
 from datetime import date, datetime
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 
 
 # Schémas pour les abonnements d'utilisateurs non enregistrés
@@ -37,8 +37,7 @@ class NonUserSubscriptionInDB(NonUserSubscriptionBase):
     validated: bool = False
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Schémas pour les abonnements validés d'utilisateurs non enregistrés
@@ -76,8 +75,7 @@ class ValidatedNonUserSubscriptionInDB(ValidatedNonUserSubscriptionBase):
     id: int
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Schémas pour les abonnements gratuits
@@ -99,5 +97,4 @@ class FreeSubscriptionInDB(FreeSubscriptionBase):
     id: int
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
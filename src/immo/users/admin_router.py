@@ -7,9 +7,18 @@ from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
-from immo.extensions import get_db
+from immo.extensions import (
+    get_db,
+    pool_statistics,
+    replica_statistics,
+    statement_cache_statistics,
+    transaction_statistics,
+)
+from immo.quotas.models import RoleQuota
 from immo.users.models import Permission, Role, User, role_permission, user_role
-from immo.users.router import get_current_user
+from immo.users.passwords import password_hasher
+from immo.users.permissions import rbac_cache
+from immo.users.router import get_current_user, user_cache
 from immo.users.schemas import (
     PermissionCreate,
     PermissionInDB,
@@ -57,7 +66,7 @@ async def create_admin(
     )
 
     # Définir le mot de passe
-    db_user.set_password(user.password)
+    await db_user.set_password_async(user.password)
 
     # Sauvegarder l'utilisateur
     db.add(db_user)
@@ -74,11 +83,12 @@ async def create_admin(
     # Assigner le rôle Admin à l'utilisateur
     stmt = user_role.insert().values(user_id=db_user.id, role_id=admin_role.id)
     await db.execute(stmt)
+    await rbac_cache.mark_changed(db)
     await db.commit()
 
     # Récupérer l'utilisateur avec ses rôles
     user_result = await db.execute(select(User).options(joinedload(User.roles)).where(User.id == db_user.id))
-    created_user = user_result.scalar_one()
+    created_user = user_result.unique().scalar_one()
 
     return created_user
 
@@ -119,6 +129,7 @@ async def create_role(
     db_role = Role(name=role.name, description=role.description)
 
     db.add(db_role)
+    await rbac_cache.mark_changed(db)
     await db.commit()
     await db.refresh(db_role)
 
@@ -181,6 +192,7 @@ async def update_role(
     role.name = role_update.name
     role.description = role_update.description
 
+    await rbac_cache.mark_changed(db)
     await db.commit()
     await db.refresh(role)
 
@@ -211,8 +223,10 @@ async def delete_role(
     if not role:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rôle non trouvé")
 
-    # Supprimer le rôle
+    # Supprimer le rôle et ses limites de quotas
+    await db.execute(delete(RoleQuota).where(RoleQuota.role_id == role_id))
     await db.delete(role)
+    await rbac_cache.mark_changed(db)
     await db.commit()
 
 
@@ -234,7 +248,9 @@ async def get_permissions(current_user: User = Depends(get_current_user), db: As
 
 @router.post("/permissions", response_model=PermissionInDB, status_code=status.HTTP_201_CREATED)
 async def create_permission(
-    permission: PermissionCreate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    permission: PermissionCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """Créer une nouvelle permission."""
     # Vérifier si l'utilisateur a le droit de créer une permission
@@ -252,6 +268,7 @@ async def create_permission(
     db_permission = Permission(name=permission.name, description=permission.description)
 
     db.add(db_permission)
+    await rbac_cache.mark_changed(db)
     await db.commit()
     await db.refresh(db_permission)
 
@@ -318,6 +335,7 @@ async def update_permission(
     permission.name = permission_update.name
     permission.description = permission_update.description
 
+    await rbac_cache.mark_changed(db)
     await db.commit()
     await db.refresh(permission)
 
@@ -350,6 +368,7 @@ async def delete_permission(
 
     # Supprimer la permission
     await db.delete(permission)
+    await rbac_cache.mark_changed(db)
     await db.commit()
 
 
@@ -384,7 +403,10 @@ async def get_role_permissions(
 
 @router.post("/roles/{role_id}/permissions/{permission_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def add_permission_to_role(
-    role_id: int, permission_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    role_id: int,
+    permission_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> None:
     """Ajouter une permission à un rôle."""
     # Vérifier si l'utilisateur a le droit d'ajouter une permission à un rôle
@@ -425,12 +447,16 @@ async def add_permission_to_role(
     # Ajouter la permission au rôle
     stmt = role_permission.insert().values(role_id=role_id, permission_id=permission_id)
     await db.execute(stmt)
+    await rbac_cache.mark_changed(db)
     await db.commit()
 
 
 @router.delete("/roles/{role_id}/permissions/{permission_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_permission_from_role(
-    role_id: int, permission_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    role_id: int,
+    permission_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> None:
     """Supprimer une permission d'un rôle."""
     # Vérifier si l'utilisateur a le droit de supprimer une permission d'un rôle
@@ -473,6 +499,7 @@ async def remove_permission_from_role(
         role_permission.c.role_id == role_id, role_permission.c.permission_id == permission_id
     )
     await db.execute(stmt)
+    await rbac_cache.mark_changed(db)
     await db.commit()
 
 
@@ -505,7 +532,10 @@ async def get_user_roles(
 
 @router.post("/users/{user_id}/roles/{role_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def add_role_to_user(
-    user_id: int, role_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    user_id: int,
+    role_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> None:
     """Ajouter un rôle à un utilisateur."""
     # Vérifier si l'utilisateur a le droit d'ajouter un rôle à un utilisateur
@@ -546,12 +576,18 @@ async def add_role_to_user(
     # Ajouter le rôle à l'utilisateur
     stmt = user_role.insert().values(user_id=user_id, role_id=role_id)
     await db.execute(stmt)
+    await rbac_cache.mark_changed(db)
     await db.commit()
 
+    user_cache.invalidate(user_id)
+
 
 @router.delete("/users/{user_id}/roles/{role_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_role_from_user(
-    user_id: int, role_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    user_id: int,
+    role_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> None:
     """Supprimer un rôle d'un utilisateur."""
     # Vérifier si l'utilisateur a le droit de supprimer un rôle d'un utilisateur
@@ -590,4 +626,79 @@ async def remove_role_from_user(
     # Supprimer le rôle de l'utilisateur
     stmt = delete(user_role).where(user_role.c.user_id == user_id, user_role.c.role_id == role_id)
     await db.execute(stmt)
+    await rbac_cache.mark_changed(db)
     await db.commit()
+
+    user_cache.invalidate(user_id)
+
+
+@router.get("/cache/users", response_model=dict)
+async def get_user_cache_stats(current_user: User = Depends(get_current_user)) -> Any:
+    """Récupérer les compteurs du cache des utilisateurs authentifiés."""
+    # Vérifier si l'utilisateur est administrateur
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'êtes pas autorisé à accéder à cette ressource"
+        )
+
+    return user_cache.stats()
+
+
+@router.get("/passwords/stats", response_model=dict)
+async def get_password_hasher_stats(current_user: User = Depends(get_current_user)) -> Any:
+    """Récupérer les compteurs du pool de hachage des mots de passe."""
+    # Vérifier si l'utilisateur est administrateur
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'êtes pas autorisé à accéder à cette ressource"
+        )
+
+    return password_hasher.stats()
+
+
+@router.get("/db/pool", response_model=dict)
+async def get_db_pool_stats(current_user: User = Depends(get_current_user)) -> Any:
+    """Récupérer l'état et les compteurs du pool de connexions à la base de données."""
+    # Vérifier si l'utilisateur est administrateur
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'êtes pas autorisé à accéder à cette ressource"
+        )
+
+    return pool_statistics()
+
+
+@router.get("/db/statements", response_model=dict)
+async def get_db_statement_stats(limit: int = 50, current_user: User = Depends(get_current_user)) -> Any:
+    """Récupérer la configuration des caches de requêtes et les compteurs par requête SQL."""
+    # Vérifier si l'utilisateur est administrateur
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'êtes pas autorisé à accéder à cette ressource"
+        )
+
+    return statement_cache_statistics(limit)
+
+
+@router.get("/db/replicas", response_model=dict)
+async def get_db_replica_stats(current_user: User = Depends(get_current_user)) -> Any:
+    """Récupérer l'état des réplicas en lecture."""
+    # Vérifier si l'utilisateur est administrateur
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'êtes pas autorisé à accéder à cette ressource"
+        )
+
+    return replica_statistics()
+
+
+@router.get("/db/transactions", response_model=dict)
+async def get_db_transaction_stats(current_user: User = Depends(get_current_user)) -> Any:
+    """Récupérer les compteurs de transactions par requête."""
+    # Vérifier si l'utilisateur est administrateur
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'êtes pas autorisé à accéder à cette ressource"
+        )
+
+    return transaction_statistics()
@@ -0,0 +1,135 @@
+"""Cache en mémoire des identités authentifiées.
+
+Chaque entrée est une photographie immuable (`Principal`) de l'utilisateur, détachée de toute session SQLAlchemy.
+Le cache est borné à la fois par une durée de vie (TTL) et par un plafond mémoire estimé, les entrées les moins
+récemment utilisées étant évincées en premier (LRU).
+"""
+
+import sys
+import time
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from immo.users.permissions import Principal, RbacSnapshot
+
+
+@dataclass(frozen=True)
+class _CacheEntry:
+    """Entrée du cache : identité, version RBAC ayant servi à résoudre ses permissions et date d'expiration."""
+
+    principal: Principal
+    rbac_version: int
+    expires_at: float
+    size: int
+
+
+def _estimate_size(principal: Principal) -> int:
+    """Estimer l'empreinte mémoire d'une identité (les chaînes des rôles et permissions sont partagées)."""
+    size = sys.getsizeof(principal) + sys.getsizeof(principal.role_ids) + sys.getsizeof(principal.role_names)
+    size += sys.getsizeof(principal.permission_names)
+    size += sys.getsizeof(principal.username or "") + sys.getsizeof(principal.email or "")
+    return size
+
+
+class UserCache:
+    """Cache LRU + TTL des identités, indexé par identifiant d'utilisateur."""
+
+    def __init__(self, ttl: float, max_bytes: int) -> None:
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Le cache est désactivé lorsque le plafond mémoire est nul."""
+        return self.max_bytes > 0
+
+    def get(self, user_id: int, rbac: RbacSnapshot) -> Optional[Principal]:
+        """Récupérer l'identité d'un utilisateur, si elle a été résolue avec la version RBAC courante."""
+        entry = self._entries.get(user_id)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.expires_at <= time.monotonic():
+            self._remove(user_id)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        if entry.rbac_version != rbac.version:
+            # La version RBAC change aussi lorsqu'un rôle est attribué ou retiré à un utilisateur, éventuellement par
+            # un autre worker : les rôles de l'entrée ne sont plus fiables, l'identité doit être relue en base
+            self._remove(user_id)
+            self.invalidations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+
+        return entry.principal
+
+    def put(self, principal: Principal, rbac: RbacSnapshot) -> None:
+        """Ajouter ou remplacer l'identité d'un utilisateur."""
+        if not self.enabled:
+            return
+
+        self._remove(principal.id)
+
+        entry = _CacheEntry(
+            principal=principal,
+            rbac_version=rbac.version,
+            expires_at=time.monotonic() + self.ttl,
+            size=_estimate_size(principal),
+        )
+        self._entries[principal.id] = entry
+        self._bytes += entry.size
+
+        while self._bytes > self.max_bytes and self._entries:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        """Retirer l'identité d'un utilisateur du cache."""
+        if self._remove(user_id):
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Vider le cache."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Compteurs exposés pour la supervision."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, user_id: int) -> bool:
+        """Retirer une entrée et mettre à jour l'empreinte mémoire."""
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.size
+        return True
@@ -1,17 +1,15 @@
 """Modèles de données pour les utilisateurs."""
 
 from datetime import datetime
+from typing import FrozenSet
 
-from passlib.context import CryptContext
 from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Table
 from sqlalchemy.orm import relationship
 
 from immo.extensions import Base
+from immo.users.passwords import hash_password, pwd_context, verify_and_update_password
 
 
-# Contexte pour le hachage des mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Table de liaison entre utilisateurs et rôles
 user_role = Table(
     "user_roles",
@@ -53,18 +51,36 @@ class User(Base):
     services = relationship("Service", back_populates="provider", cascade="all, delete-orphan")
     roles = relationship("Role", secondary=user_role, back_populates="users")
 
+    # Noms des permissions effectives, résolus une seule fois par requête (voir immo.users.permissions)
+    _permission_names = None
+
     def __repr__(self) -> str:
         """Représentation de l'objet."""
         return f"<User {self.username}>"
 
     def set_password(self, password: str) -> None:
-        """Définir le mot de passe de l'utilisateur."""
+        """Définir le mot de passe de l'utilisateur (bloquant, réservé aux scripts)."""
         self.password_hash = pwd_context.hash(password)
 
     def verify_password(self, password: str) -> bool:
-        """Vérifier le mot de passe de l'utilisateur."""
+        """Vérifier le mot de passe de l'utilisateur (bloquant, réservé aux scripts)."""
         return pwd_context.verify(password, self.password_hash)
 
+    async def set_password_async(self, password: str) -> None:
+        """Définir le mot de passe de l'utilisateur sans bloquer la boucle d'événements."""
+        self.password_hash = await hash_password(password)
+
+    async def verify_password_async(self, password: str) -> bool:
+        """Vérifier le mot de passe de l'utilisateur sans bloquer la boucle d'événements.
+
+        Si le hachage stocké ne respecte plus la politique courante (algorithme ou coût), il est remplacé ; la
+        modification est enregistrée avec le prochain commit de la session.
+        """
+        valid, new_hash = await verify_and_update_password(password, self.password_hash)
+        if valid and new_hash is not None:
+            self.password_hash = new_hash
+        return valid
+
     def update_last_seen(self) -> None:
         """Mettre à jour la date de dernière visite."""
         self.last_seen = datetime.utcnow()
@@ -73,9 +89,22 @@ class User(Base):
         """Vérifier si l'utilisateur a un rôle spécifique."""
         return any(role.name == role_name for role in self.roles)
 
+    def set_permission_names(self, permission_names: FrozenSet[str]) -> None:
+        """Mémoriser les permissions effectives de l'utilisateur pour la durée de la requête."""
+        self._permission_names = permission_names
+
+    @property
+    def permission_names(self) -> FrozenSet[str]:
+        """Noms des permissions effectives de l'utilisateur."""
+        if self._permission_names is None:
+            self._permission_names = frozenset(
+                permission.name for role in self.roles for permission in role.permissions
+            )
+        return self._permission_names
+
     def has_permission(self, permission_name: str) -> bool:
         """Vérifier si l'utilisateur a une permission spécifique."""
-        return any(any(permission.name == permission_name for permission in role.permissions) for role in self.roles)
+        return permission_name in self.permission_names
 
     @property
     def is_admin(self) -> bool:
@@ -106,6 +135,19 @@ class Role(Base):
         return f"<Role {self.name}>"
 
 
+class RbacVersion(Base):
+    """Compteur de version des rôles et permissions, partagé entre les workers."""
+
+    __tablename__ = "rbac_versions"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        """Représentation de l'objet."""
+        return f"<RbacVersion {self.version}>"
+
+
 class Permission(Base):
     """Modèle de données pour les permissions."""
 
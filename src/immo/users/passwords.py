@@ -0,0 +1,245 @@
+"""Hachage et vérification des mots de passe hors de la boucle d'événements.
+
+bcrypt consomme volontairement plusieurs centaines de millisecondes de CPU par appel : exécuté directement dans un
+handler asynchrone, il bloque toutes les autres requêtes du worker. Les appels sont donc délégués à un pool de threads
+(bcrypt relâche le GIL) ou de processus, derrière un sémaphore qui borne le nombre de calculs simultanés et une file
+d'attente de taille limitée au-delà de laquelle la requête est refusée (503).
+
+L'algorithme et son coût sont pilotés par `PASSWORD_HASH_SCHEME` et `PASSWORD_HASH_ROUNDS`. Les hachages produits avec
+un autre algorithme ou un autre coût restent vérifiables et sont recalculés lors de la connexion suivante ; la commande
+`calibrate-passwords` aide à choisir le coût adapté à la machine.
+"""
+
+import asyncio
+import logging
+import time
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from passlib.registry import get_crypt_handler
+
+from immo.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Algorithmes dont les hachages existants restent vérifiables (et seront migrés à la connexion)
+LEGACY_SCHEMES = ["bcrypt"]
+
+
+def build_crypt_context(scheme: str, rounds: Optional[int] = None) -> CryptContext:
+    """Construire le contexte de hachage pour un algorithme et un coût donnés.
+
+    Le coût est imposé comme minimum et maximum : tout hachage d'un autre coût est signalé par `needs_update`, ce
+    qui permet de faire évoluer `PASSWORD_HASH_ROUNDS` dans les deux sens.
+    """
+    schemes = [scheme] + [legacy for legacy in LEGACY_SCHEMES if legacy != scheme]
+    options: Dict[str, Any] = {}
+    if rounds:
+        options = {
+            f"{scheme}__default_rounds": rounds,
+            f"{scheme}__min_rounds": rounds,
+            f"{scheme}__max_rounds": rounds,
+        }
+    return CryptContext(schemes=schemes, default=scheme, deprecated="auto", **options)
+
+
+# Contexte pour le hachage des mots de passe
+pwd_context = build_crypt_context(settings.PASSWORD_HASH_SCHEME, settings.PASSWORD_HASH_ROUNDS)
+
+
+def _hash(password: str) -> str:
+    """Hacher un mot de passe (exécuté dans le pool)."""
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    """Vérifier un mot de passe (exécuté dans le pool)."""
+    return pwd_context.verify(password, password_hash)
+
+
+def _verify_and_update(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """Vérifier un mot de passe et recalculer son hachage s'il ne respecte plus la politique (exécuté dans le pool)."""
+    return pwd_context.verify_and_update(password, password_hash)
+
+
+def measure_hash_time(scheme: str, rounds: int, samples: int = 3) -> float:
+    """Durée médiane (en millisecondes) d'un hachage sur la machine courante."""
+    context = build_crypt_context(scheme, rounds)
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash("calibration")
+        durations.append((time.perf_counter() - started) * 1000)
+    return sorted(durations)[len(durations) // 2]
+
+
+def calibrate_rounds(scheme: str, target_ms: float, samples: int = 3) -> Tuple[int, List[Tuple[int, float]]]:
+    """Choisir le coût le plus élevé dont le hachage reste sous la latence cible.
+
+    Retourne le coût retenu et les mesures effectuées (coût, durée en millisecondes).
+    """
+    handler = get_crypt_handler(scheme)
+    if "rounds" not in getattr(handler, "setting_kwds", ()):
+        raise ValueError(f"L'algorithme {scheme} n'a pas de coût réglable")
+
+    min_rounds = handler.min_rounds or 1
+    max_rounds = handler.max_rounds or 2**31 - 1
+    measurements: List[Tuple[int, float]] = []
+
+    if handler.rounds_cost == "log2":
+        # Le temps double à chaque incrément : on monte tant que la cible est respectée
+        rounds = min_rounds
+        elapsed = measure_hash_time(scheme, rounds, samples)
+        measurements.append((rounds, elapsed))
+        while rounds < max_rounds and elapsed * 2 <= target_ms:
+            rounds += 1
+            elapsed = measure_hash_time(scheme, rounds, samples)
+            measurements.append((rounds, elapsed))
+        if elapsed > target_ms and rounds > min_rounds:
+            rounds -= 1
+        return rounds, measurements
+
+    # Coût linéaire : extrapolation depuis le coût par défaut, puis vérification
+    reference = handler.default_rounds
+    elapsed = measure_hash_time(scheme, reference, samples)
+    measurements.append((reference, elapsed))
+    rounds = max(min_rounds, min(max_rounds, int(reference * target_ms / max(elapsed, 0.001))))
+    measurements.append((rounds, measure_hash_time(scheme, rounds, samples)))
+    return rounds, measurements
+
+
+class PasswordHasher:
+    """Exécuteur borné des opérations de hachage."""
+
+    def __init__(self, executor: str = "thread", max_workers: int = 4, max_queue: int = 64) -> None:
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Type d'exécuteur inconnu: {executor}")
+
+        self.executor_kind = executor
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self._waiting = 0
+        self._running = 0
+        self._max_waiting = 0
+        self._completed = 0
+        self._rejected = 0
+        self._rehashed = 0
+        self._wait_time = 0.0
+        self._run_time = 0.0
+
+    async def hash(self, password: str) -> str:
+        """Hacher un mot de passe sans bloquer la boucle d'événements."""
+        return await self._submit(_hash, password)
+
+    async def verify(self, password: str, password_hash: Optional[str]) -> bool:
+        """Vérifier un mot de passe sans bloquer la boucle d'événements."""
+        if not password_hash:
+            return False
+        return await self._submit(_verify, password, password_hash)
+
+    async def verify_and_update(self, password: str, password_hash: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Vérifier un mot de passe et fournir un nouveau hachage si le sien est obsolète."""
+        if not password_hash:
+            return False, None
+        valid, new_hash = await self._submit(_verify_and_update, password, password_hash)
+        if new_hash is not None:
+            self._rehashed += 1
+        return valid, new_hash
+
+    def shutdown(self) -> None:
+        """Arrêter le pool (les appels suivants en recréeront un)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._semaphore = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques d'utilisation du pool."""
+        return {
+            "scheme": settings.PASSWORD_HASH_SCHEME,
+            "rounds": settings.PASSWORD_HASH_ROUNDS,
+            "executor": self.executor_kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "queue_depth": self._waiting,
+            "max_queue_depth": self._max_waiting,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "rehashed": self._rehashed,
+            "avg_wait_ms": round(self._wait_time / self._completed * 1000, 2) if self._completed else 0.0,
+            "avg_run_ms": round(self._run_time / self._completed * 1000, 2) if self._completed else 0.0,
+        }
+
+    def _get_executor(self) -> Executor:
+        """Créer le pool à la première utilisation."""
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hasher")
+            logger.info(f"Pool de hachage des mots de passe démarré ({self.executor_kind}, {self.max_workers} workers)")
+        return self._executor
+
+    async def _submit(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Exécuter une opération dans le pool en respectant la limite de concurrence."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        if self.max_queue and self._semaphore.locked() and self._waiting >= self.max_queue:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Serveur surchargé, veuillez réessayer",
+                headers={"Retry-After": "1"},
+            )
+
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        self._max_waiting = max(self._max_waiting, self._waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        started_at = time.perf_counter()
+        self._running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._running -= 1
+            self._semaphore.release()
+            self._completed += 1
+            self._wait_time += started_at - queued_at
+            self._run_time += time.perf_counter() - started_at
+
+
+# Instance unique pour le processus
+password_hasher = PasswordHasher(
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+
+async def hash_password(password: str) -> str:
+    """Hacher un mot de passe dans le pool dédié."""
+    return await password_hasher.hash(password)
+
+
+async def verify_password(password: str, password_hash: Optional[str]) -> bool:
+    """Vérifier un mot de passe dans le pool dédié."""
+    return await password_hasher.verify(password, password_hash)
+
+
+async def verify_and_update_password(password: str, password_hash: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """Vérifier un mot de passe dans le pool dédié, avec recalcul du hachage si la politique a changé."""
+    return await password_hasher.verify_and_update(password, password_hash)
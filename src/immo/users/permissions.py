@@ -0,0 +1,218 @@
+"""Résolution des permissions effectives des utilisateurs.
+
+Le graphe rôle → permissions change rarement (uniquement via le router d'administration) : il est donc gardé en
+mémoire dans un cache versionné, partagé par toutes les requêtes du processus. Les endpoints qui le modifient
+appellent `rbac_cache.mark_changed` avant leur commit ; le cache est alors invalidé une fois la transaction validée.
+"""
+
+import asyncio
+import logging
+import secrets
+import time
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import FrozenSet, Iterable, Mapping, Optional
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from immo.config import settings
+from immo.users.models import Permission, RbacVersion, Role, role_permission
+
+
+logger = logging.getLogger(__name__)
+
+# Clé posée dans `Session.info` lorsqu'une transaction modifie les rôles ou les permissions
+RBAC_CHANGED_KEY = "rbac_changed"
+
+
+@dataclass(frozen=True)
+class RbacSnapshot:
+    """Photographie immuable du graphe rôle → permissions."""
+
+    version: int
+    # Version annoncée dans les tokens d'accès (claim `pv`), voir `RbacCache._load`
+    token_version: str
+    role_names: Mapping[int, str]
+    permission_names: Mapping[int, str]
+    permission_ids: Mapping[str, int]
+    role_permissions: Mapping[int, FrozenSet[str]]
+
+    def permissions_for_roles(self, role_ids: Iterable[int]) -> FrozenSet[str]:
+        """Noms des permissions accordées par un ensemble de rôles."""
+        return frozenset().union(*(self.role_permissions.get(role_id, frozenset()) for role_id in role_ids))
+
+    def encode_permissions(self, permission_names: Iterable[str]) -> str:
+        """Encoder des permissions en bitmap hexadécimal indexé sur les identifiants de `Permission`."""
+        bitmap = 0
+        for name in permission_names:
+            permission_id = self.permission_ids.get(name)
+            if permission_id is not None:
+                bitmap |= 1 << permission_id
+        return format(bitmap, "x")
+
+    def decode_permissions(self, encoded: str) -> FrozenSet[str]:
+        """Décoder un bitmap produit par `encode_permissions`."""
+        bitmap = int(encoded, 16)
+        return frozenset(name for permission_id, name in self.permission_names.items() if bitmap >> permission_id & 1)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Identité authentifiée et droits effectifs, indépendants de la session de base de données."""
+
+    id: int
+    role_names: FrozenSet[str]
+    permission_names: FrozenSet[str]
+    role_ids: FrozenSet[int] = frozenset()
+    username: Optional[str] = None
+    email: Optional[str] = None
+
+    def has_role(self, role_name: str) -> bool:
+        """Vérifier si l'utilisateur a un rôle spécifique."""
+        return role_name in self.role_names
+
+    def has_permission(self, permission_name: str) -> bool:
+        """Vérifier si l'utilisateur a une permission spécifique."""
+        return permission_name in self.permission_names
+
+    @property
+    def is_admin(self) -> bool:
+        """Vérifier si l'utilisateur est administrateur."""
+        return self.has_role("Admin") or self.has_role("SuperAdmin")
+
+    @property
+    def is_super_admin(self) -> bool:
+        """Vérifier si l'utilisateur est super administrateur."""
+        return self.has_role("SuperAdmin")
+
+
+class RbacCache:
+    """Cache en mémoire, versionné, du graphe rôle → permissions."""
+
+    def __init__(self) -> None:
+        self._snapshot: Optional[RbacSnapshot] = None
+        self._local_version = 0
+        # Époque aléatoire du processus : un compteur local qui repart de 0 à chaque démarrage ne doit pas suffire à
+        # valider un token émis par un autre processus (ou avant un redémarrage)
+        self._epoch = secrets.token_hex(8)
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def current(self) -> Optional[RbacSnapshot]:
+        """Photographie courante, sans accès à la base de données (None si le cache est froid)."""
+        return self._snapshot
+
+    async def warm(self, db: AsyncSession) -> RbacSnapshot:
+        """Charger (ou recharger) le graphe complet depuis la base de données."""
+        async with self._lock:
+            return await self._load(db)
+
+    async def get(self, db: AsyncSession) -> RbacSnapshot:
+        """Récupérer la photographie courante, en la rechargeant si nécessaire."""
+        snapshot = self._snapshot
+
+        if snapshot is not None and settings.RBAC_CACHE_SYNC:
+            now = time.monotonic()
+            if now - self._checked_at >= settings.RBAC_CACHE_SYNC_INTERVAL:
+                self._checked_at = now
+                if await self._read_db_version(db) != snapshot.version:
+                    self.invalidate()
+                    snapshot = None
+
+        if snapshot is None:
+            async with self._lock:
+                # Un autre appel a peut-être déjà rechargé le cache pendant l'attente du verrou
+                snapshot = self._snapshot or await self._load(db)
+
+        return snapshot
+
+    def invalidate(self) -> None:
+        """Invalider la photographie courante ; la prochaine lecture rechargera le graphe."""
+        self._snapshot = None
+        self._local_version += 1
+
+    async def mark_changed(self, db: AsyncSession) -> None:
+        """Signaler que la transaction courante modifie les rôles, les permissions ou leurs associations."""
+        db.sync_session.info[RBAC_CHANGED_KEY] = True
+
+        if settings.RBAC_CACHE_SYNC:
+            result = await db.execute(
+                update(RbacVersion).where(RbacVersion.id == 1).values(version=RbacVersion.version + 1)
+            )
+            if result.rowcount == 0:
+                await db.execute(insert(RbacVersion).values(id=1, version=1))
+
+    async def _read_db_version(self, db: AsyncSession) -> int:
+        """Lire le compteur de version partagé entre les workers."""
+        result = await db.execute(select(RbacVersion.version).where(RbacVersion.id == 1))
+        return result.scalar_one_or_none() or 0
+
+    async def _load(self, db: AsyncSession) -> RbacSnapshot:
+        """Construire une nouvelle photographie depuis la base de données."""
+        generation = self._local_version
+
+        if settings.RBAC_CACHE_SYNC:
+            version = await self._read_db_version(db)
+            self._checked_at = time.monotonic()
+        else:
+            version = self._local_version
+
+        # Sans compteur partagé, la version des tokens n'a de sens que pour ce processus et ce chargement
+        token_version = str(version) if settings.RBAC_CACHE_SYNC else f"{self._epoch}.{version}"
+
+        roles_result = await db.execute(select(Role.id, Role.name))
+        role_names = dict(roles_result.tuples().all())
+
+        permissions_result = await db.execute(select(Permission.id, Permission.name))
+        permission_names = dict(permissions_result.tuples().all())
+
+        links_result = await db.execute(select(role_permission.c.role_id, role_permission.c.permission_id))
+        role_permissions: dict[int, set[str]] = {role_id: set() for role_id in role_names}
+        for role_id, permission_id in links_result.tuples().all():
+            if role_id in role_permissions and permission_id in permission_names:
+                role_permissions[role_id].add(permission_names[permission_id])
+
+        snapshot = RbacSnapshot(
+            version=version,
+            token_version=token_version,
+            role_names=MappingProxyType(role_names),
+            permission_names=MappingProxyType(permission_names),
+            permission_ids=MappingProxyType({name: permission_id for permission_id, name in permission_names.items()}),
+            role_permissions=MappingProxyType(
+                {role_id: frozenset(names) for role_id, names in role_permissions.items()}
+            ),
+        )
+        # Ne pas publier une photographie invalidée pendant son chargement
+        if generation == self._local_version:
+            self._snapshot = snapshot
+
+        logger.info(
+            f"Cache RBAC chargé (version {version}): {len(role_names)} rôles, {len(permission_names)} permissions"
+        )
+
+        return snapshot
+
+
+# Instance unique du cache pour le processus
+rbac_cache = RbacCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_rbac_cache_after_commit(session: Session) -> None:
+    """Invalider le cache une fois validée une transaction ayant modifié les rôles ou les permissions."""
+    if session.in_nested_transaction():
+        # Libération d'un savepoint : la transaction principale n'est pas encore validée
+        return
+    if session.info.pop(RBAC_CHANGED_KEY, False):
+        rbac_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rbac_change_after_rollback(session: Session) -> None:
+    """Oublier les modifications annulées."""
+    if not session.in_nested_transaction():
+        session.info.pop(RBAC_CHANGED_KEY, None)
@@ -6,13 +6,15 @@ from typing import Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import Session, joinedload
 
 from immo.config import settings
 from immo.extensions import get_db
+from immo.users.cache import UserCache
 from immo.users.models import Role, User, user_role as UserRole
+from immo.users.permissions import Principal, rbac_cache
 from immo.users.schemas import (
     Token,
     TokenPayload,
@@ -27,6 +29,36 @@ from immo.users.schemas import (
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")
 
+# Cache des identités authentifiées, invalidé par les endpoints qui modifient un utilisateur ou ses rôles
+user_cache = UserCache(ttl=settings.USER_CACHE_TTL, max_bytes=settings.USER_CACHE_MAX_BYTES)
+
+# Clé posée dans `Session.info` : identifiants des utilisateurs supprimés par la transaction courante
+DELETED_USERS_KEY = "deleted_users"
+
+
+@event.listens_for(Session, "after_flush")
+def _track_deleted_users(session: Session, flush_context: Any) -> None:
+    """Mémoriser les utilisateurs supprimés, quel que soit l'endpoint (ou la cascade) qui les supprime."""
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, User)}
+    if deleted:
+        session.info.setdefault(DELETED_USERS_KEY, set()).update(deleted)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_deleted_users(session: Session) -> None:
+    """Retirer du cache les utilisateurs supprimés, une fois la transaction principale validée."""
+    if session.in_nested_transaction():
+        return
+    for user_id in session.info.pop(DELETED_USERS_KEY, ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_deleted_users(session: Session) -> None:
+    """Oublier les suppressions annulées (l'annulation d'un savepoint ne concerne pas la transaction principale)."""
+    if not session.in_nested_transaction():
+        session.info.pop(DELETED_USERS_KEY, None)
+
 
 async def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Créer un token d'accès JWT."""
@@ -44,14 +76,19 @@ async def create_access_token(data: dict, expires_delta: Optional[timedelta] = N
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
-    """Récupérer l'utilisateur connecté à partir du token JWT."""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    """Erreur renvoyée lorsque le token ne permet pas d'authentifier l'utilisateur."""
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Identifiants invalides",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _decode_access_token(token: str) -> dict:
+    """Décoder et valider un token d'accès JWT."""
+    credentials_exception = _credentials_exception()
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: Optional[int] = payload.get("sub")
@@ -67,15 +104,101 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     if token_data.exp and datetime.fromtimestamp(token_data.exp) < datetime.utcnow():
         raise credentials_exception
 
-    result = await db.execute(select(User).options(joinedload(User.roles)).where(User.id == token_data.sub))
-    user = result.scalar_one_or_none()
+    payload["sub"] = token_data.sub
+    return payload
+
+
+async def _load_user(db: AsyncSession, user_id: int) -> User:
+    """Charger l'utilisateur et ses rôles, et résoudre ses permissions effectives."""
+    result = await db.execute(select(User).options(joinedload(User.roles)).where(User.id == user_id))
+    user = result.unique().scalar_one_or_none()
 
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+
+    # Résoudre les permissions effectives une seule fois pour toute la requête, depuis le cache RBAC
+    rbac = await rbac_cache.get(db)
+    user.set_permission_names(rbac.permissions_for_roles(role.id for role in user.roles))
+
+    user_cache.put(principal_from_user(user), rbac)
 
     return user
 
 
+def principal_from_user(user: User) -> Principal:
+    """Photographie immuable d'un utilisateur dont les rôles et permissions sont résolus."""
+    return Principal(
+        id=user.id,
+        role_names=frozenset(role.name for role in user.roles),
+        permission_names=user.permission_names,
+        role_ids=frozenset(role.id for role in user.roles),
+        username=user.username,
+        email=user.email,
+    )
+
+
+async def build_access_token_claims(db: AsyncSession, user: User) -> dict:
+    """Construire les claims du token d'accès d'un utilisateur dont les rôles sont chargés.
+
+    Si `JWT_EMBED_PERMISSIONS` est activé, le token embarque les rôles, un bitmap des permissions et la version du
+    cache RBAC, ce qui permet à `get_current_principal` d'autoriser la requête sans accès à la base de données.
+    """
+    claims = {"sub": str(user.id)}
+
+    if settings.JWT_EMBED_PERMISSIONS:
+        rbac = await rbac_cache.get(db)
+        role_ids = [role.id for role in user.roles]
+        claims.update(
+            {
+                "rl": role_ids,
+                "pm": rbac.encode_permissions(rbac.permissions_for_roles(role_ids)),
+                "pv": rbac.token_version,
+            }
+        )
+
+    return claims
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+    """Récupérer l'utilisateur connecté à partir du token JWT."""
+    payload = _decode_access_token(token)
+
+    return await _load_user(db, payload["sub"])
+
+
+async def get_current_principal(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Principal:
+    """Récupérer l'identité et les droits de l'utilisateur connecté, sans accès à la base si possible.
+
+    Lorsque le token embarque des permissions dont la version correspond au cache RBAC du processus, la requête est
+    autorisée directement à partir du token. Sinon (token sans claims, version périmée, cache froid), l'identité est
+    lue dans le cache des utilisateurs, puis en dernier recours chargée depuis la base de données.
+
+    Réservée aux endpoints de lecture : un rôle retiré reste accordé par le token jusqu'à son expiration. Les
+    écritures et l'administration dépendent de `get_current_user`, validé en base à chaque requête.
+    """
+    payload = _decode_access_token(token)
+
+    rbac = rbac_cache.current
+    if rbac is not None and payload.get("pv") == rbac.token_version:
+        try:
+            return Principal(
+                id=payload["sub"],
+                role_names=frozenset(
+                    rbac.role_names[role_id] for role_id in payload["rl"] if role_id in rbac.role_names
+                ),
+                permission_names=rbac.decode_permissions(payload["pm"]),
+                role_ids=frozenset(payload["rl"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            raise _credentials_exception() from None
+
+    principal = user_cache.get(payload["sub"], await rbac_cache.get(db))
+    if principal is not None:
+        return principal
+
+    return principal_from_user(await _load_user(db, payload["sub"]))
+
+
 @router.post("/register", response_model=UserInDB, status_code=status.HTTP_201_CREATED)
 async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)) -> Any:
     """Enregistrer un nouvel utilisateur."""
@@ -105,7 +228,7 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)) ->
     )
 
     # Hacher le mot de passe
-    db_user.set_password(user.password)
+    await db_user.set_password_async(user.password)
 
     db.add(db_user)
     await db.commit()
@@ -120,13 +243,12 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)) ->
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Erreur lors de l'attribution du rôle utilisateur"
         )
 
-    db_user_role = UserRole(user_id=db_user.id, role_id=user_role.id)
-    db.add(db_user_role)
+    await db.execute(UserRole.insert().values(user_id=db_user.id, role_id=user_role.id))
     await db.commit()
 
     # Récupérer l'utilisateur avec ses rôles
     result = await db.execute(select(User).options(joinedload(User.roles)).where(User.id == db_user.id))
-    created_user = result.scalar_one()
+    created_user = result.unique().scalar_one()
 
     return created_user
 
@@ -135,9 +257,9 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)) ->
 async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)) -> Any:
     """Connecter un utilisateur."""
     user_result = await db.execute(select(User).options(joinedload(User.roles)).where(User.email == form_data.username))
-    user = user_result.scalar_one_or_none()
+    user = user_result.unique().scalar_one_or_none()
 
-    if not user or not user.verify_password(form_data.password):
+    if not user or not await user.verify_password_async(form_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou mot de passe incorrect",
@@ -149,9 +271,11 @@ async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Async
     await db.commit()
 
     # Créer les tokens d'accès et de rafraîchissement
-    access_token = await create_access_token(data={"sub": user.id}, expires_delta=settings.access_token_expires)
+    access_token = await create_access_token(
+        data=await build_access_token_claims(db, user), expires_delta=settings.access_token_expires
+    )
 
-    refresh_token = await create_access_token(data={"sub": user.id}, expires_delta=settings.refresh_token_expires)
+    refresh_token = await create_access_token(data={"sub": str(user.id)}, expires_delta=settings.refresh_token_expires)
 
     return {
         "access_token": access_token,
@@ -178,8 +302,8 @@ async def refresh_token(token: str = Depends(oauth2_scheme), db: AsyncSession =
             )
 
         # Vérifier si l'utilisateur existe
-        user_result = await db.execute(select(User).where(User.id == user_id))
-        user = user_result.scalar_one_or_none()
+        user_result = await db.execute(select(User).options(joinedload(User.roles)).where(User.id == int(user_id)))
+        user = user_result.unique().scalar_one_or_none()
 
         if user is None:
             raise HTTPException(
@@ -189,10 +313,14 @@ async def refresh_token(token: str = Depends(oauth2_scheme), db: AsyncSession =
             )
 
         # Créer un nouveau token d'accès
-        access_token = await create_access_token(data={"sub": user_id}, expires_delta=settings.access_token_expires)
+        access_token = await create_access_token(
+            data=await build_access_token_claims(db, user), expires_delta=settings.access_token_expires
+        )
 
         # Créer un nouveau token de rafraîchissement
-        refresh_token = await create_access_token(data={"sub": user_id}, expires_delta=settings.refresh_token_expires)
+        refresh_token = await create_access_token(
+            data={"sub": str(user.id)}, expires_delta=settings.refresh_token_expires
+        )
 
         return {
             "access_token": access_token,
@@ -247,6 +375,8 @@ async def update_user_me(
     await db.commit()
     await db.refresh(current_user)
 
+    user_cache.put(principal_from_user(current_user), await rbac_cache.get(db))
+
     return current_user
 
 
@@ -258,7 +388,7 @@ async def change_password(
 ) -> None:
     """Changer le mot de passe de l'utilisateur connecté."""
     # Vérifier l'ancien mot de passe
-    if not current_user.verify_password(password_data.old_password):
+    if not await current_user.verify_password_async(password_data.old_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ancien mot de passe incorrect")
 
     # Vérifier que les nouveaux mots de passe correspondent
@@ -266,13 +396,15 @@ async def change_password(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Les mots de passe ne correspondent pas")
 
     # Mettre à jour le mot de passe
-    current_user.set_password(password_data.password)
+    await current_user.set_password_async(password_data.password)
     await db.commit()
 
+    user_cache.invalidate(current_user.id)
+
 
 @router.get("/{user_id}", response_model=UserInDB)
 async def read_user(
-    user_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    user_id: int, current_user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_db)
 ) -> Any:
     """Récupérer les informations d'un utilisateur par son ID."""
     # Vérifier les permissions
@@ -283,7 +415,7 @@ async def read_user(
 
     # Récupérer l'utilisateur
     user_result = await db.execute(select(User).options(joinedload(User.roles)).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
+    user = user_result.unique().scalar_one_or_none()
 
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur non trouvé")
@@ -5,7 +5,7 @@ import re
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, ValidationInfo, field_validator
 
 
 # Schémas pour les rôles
@@ -33,8 +33,7 @@ class RoleInDB(RoleBase):
 
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Schémas pour les permissions
@@ -62,8 +61,7 @@ class PermissionInDB(PermissionBase):
 
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Schémas pour les utilisateurs
@@ -95,9 +93,9 @@ class UserCreate(UserBase):
         return v
 
     @field_validator("confirm_password")
-    def passwords_match(cls, v, values, **kwargs):
+    def passwords_match(cls, v, info: ValidationInfo):
         """Validation que les mots de passe correspondent."""
-        if "password" in values and v != values["password"]:
+        if "password" in info.data and v != info.data["password"]:
             raise ValueError("Les mots de passe ne correspondent pas")
         return v
 
@@ -138,9 +136,9 @@ class UserChangePassword(BaseModel):
         return v
 
     @field_validator("confirm_password")
-    def passwords_match(cls, v, values, **kwargs):
+    def passwords_match(cls, v, info: ValidationInfo):
         """Validation que les mots de passe correspondent."""
-        if "password" in values and v != values["password"]:
+        if "password" in info.data and v != info.data["password"]:
             raise ValueError("Les mots de passe ne correspondent pas")
         return v
 
@@ -171,8 +169,7 @@ class UserInDB(UserBase):
     last_seen: datetime
     roles: List[RoleInDB] = []
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserWithToken(Token):
@@ -76,3 +76,16 @@ class StatusProject(Base):
     def __repr__(self) -> str:
         """Représentation de l'objet."""
         return f"<StatusProject {self.name}>"
+
+
+class ReferenceVersion(Base):
+    """Compteur de version des données de référence, partagé entre les workers."""
+
+    __tablename__ = "reference_versions"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        """Représentation de l'objet."""
+        return f"<ReferenceVersion {self.version}>"
@@ -0,0 +1,272 @@
+"""Référentiel en mémoire des données de référence.
+
+Les pays, les villes, les devises et les statuts de projet ne changent que par le router des utilitaires, quelques
+fois par an : ils sont chargés au démarrage dans une photographie immuable, indexée par identifiant, par code et
+(pour les villes) par pays, et partagée par toutes les requêtes du processus. Les endpoints de lecture des
+utilitaires et les contrôles de clés étrangères des projets n'interrogent donc pas la base de données.
+
+Les endpoints qui modifient ces données appellent `reference_cache.mark_changed` avant leur commit ; le cache est alors
+invalidé une fois la transaction validée. Lorsque plusieurs workers servent l'application, `REFERENCE_CACHE_SYNC`
+active un compteur de version en base, vérifié au plus une fois par `REFERENCE_CACHE_SYNC_INTERVAL`, qui propage
+l'invalidation aux autres workers.
+
+Chaque photographie garde aussi les corps des réponses des endpoints de lecture, rendus en JSON et compressés à la
+première demande (`ReferenceSnapshot.rendered`) : tant que la version ne change pas, ces endpoints se résument à une
+copie mémoire.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Callable, Dict, Hashable, List, Mapping, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from immo.compression import PrecompressedBody
+from immo.config import settings
+from immo.utils.models import City, Country, Currency, ReferenceVersion, StatusProject
+from immo.utils.schemas import CityInDB, CountryInDB, CurrencyInDB, StatusProjectInDB
+
+
+logger = logging.getLogger(__name__)
+
+# Clé posée dans `Session.info` lorsqu'une transaction modifie les données de référence
+REFERENCES_CHANGED_KEY = "references_changed"
+
+# Corps de réponse gardés par photographie, les moins récemment servis étant évincés au-delà
+RENDERED_MAX_ENTRIES = 1024
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    """Photographie immuable des données de référence, indexées par identifiant (dans l'ordre des identifiants).
+
+    `etag` et `modified_at` sont les validateurs HTTP des réponses construites à partir de la photographie.
+    """
+
+    version: int
+    etag: str
+    modified_at: datetime
+    countries: Mapping[int, CountryInDB]
+    cities: Mapping[int, CityInDB]
+    currencies: Mapping[int, CurrencyInDB]
+    status_projects: Mapping[int, StatusProjectInDB]
+    countries_by_code: Mapping[str, CountryInDB]
+    currencies_by_code: Mapping[str, CurrencyInDB]
+    cities_by_country: Mapping[int, Tuple[CityInDB, ...]]
+    # Corps de réponse rendus à la demande pour cette version, du moins au plus récemment servi (voir `rendered`)
+    _rendered: "OrderedDict[Hashable, PrecompressedBody]" = field(
+        default_factory=OrderedDict, compare=False, repr=False
+    )
+
+    def rendered(self, key: Hashable, render: Callable[[], bytes]) -> PrecompressedBody:
+        """Corps de réponse identifié par `key`, rendu et compressé une seule fois pour cette version.
+
+        Au plus `RENDERED_MAX_ENTRIES` corps sont gardés : le moins récemment servi est évincé au-delà.
+        """
+        body = self._rendered.get(key)
+        if body is None:
+            body = self._rendered[key] = PrecompressedBody.of(render())
+            if len(self._rendered) > RENDERED_MAX_ENTRIES:
+                self._rendered.popitem(last=False)
+        else:
+            self._rendered.move_to_end(key)
+        return body
+
+    def missing(
+        self,
+        status_project_id: Optional[int] = None,
+        city_id: Optional[int] = None,
+        currency_id: Optional[int] = None,
+        country_id: Optional[int] = None,
+    ) -> List[str]:
+        """Données de référence demandées mais absentes de la photographie."""
+        requested = (
+            ("status_project", status_project_id, self.status_projects),
+            ("city", city_id, self.cities),
+            ("currency", currency_id, self.currencies),
+            ("country", country_id, self.countries),
+        )
+        return [name for name, value, index in requested if value is not None and value not in index]
+
+
+class ReferenceCache:
+    """Cache en mémoire, versionné, des données de référence."""
+
+    # Intervalle minimal (secondes) entre deux rechargements provoqués par une donnée absente
+    RELOAD_INTERVAL = 1.0
+
+    def __init__(self) -> None:
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._local_version = 0
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def current(self) -> Optional[ReferenceSnapshot]:
+        """Photographie courante, sans accès à la base de données (None si le cache est froid)."""
+        return self._snapshot
+
+    async def warm(self, db: AsyncSession) -> ReferenceSnapshot:
+        """Charger (ou recharger) toutes les données de référence depuis la base de données."""
+        async with self._lock:
+            return await self._load(db)
+
+    async def get(self, db: AsyncSession) -> ReferenceSnapshot:
+        """Récupérer la photographie courante, en la rechargeant si nécessaire."""
+        snapshot = self._snapshot
+
+        if snapshot is not None and settings.REFERENCE_CACHE_SYNC:
+            now = time.monotonic()
+            if now - self._checked_at >= settings.REFERENCE_CACHE_SYNC_INTERVAL:
+                self._checked_at = now
+                if await self._read_db_version(db) != snapshot.version:
+                    self.invalidate()
+                    snapshot = None
+
+        if snapshot is None:
+            async with self._lock:
+                # Un autre appel a peut-être déjà chargé le cache pendant l'attente du verrou
+                snapshot = self._snapshot or await self._load(db)
+
+        return snapshot
+
+    async def resolve(
+        self,
+        db: AsyncSession,
+        status_project_id: Optional[int] = None,
+        city_id: Optional[int] = None,
+        currency_id: Optional[int] = None,
+        country_id: Optional[int] = None,
+    ) -> ReferenceSnapshot:
+        """Récupérer une photographie contenant les données demandées si elles existent.
+
+        Une donnée absente peut avoir été créée par un autre worker : la photographie est alors rechargée, au plus une
+        fois par `RELOAD_INTERVAL` pour qu'un identifiant inexistant ne provoque pas un rechargement par requête.
+        """
+        snapshot = await self.get(db)
+        if snapshot.missing(status_project_id, city_id, currency_id, country_id):
+            if time.monotonic() - self._loaded_at >= self.RELOAD_INTERVAL:
+                self.invalidate()
+                snapshot = await self.get(db)
+        return snapshot
+
+    def invalidate(self) -> None:
+        """Invalider la photographie courante ; la prochaine lecture rechargera les données."""
+        self._snapshot = None
+        self._local_version += 1
+
+    async def mark_changed(self, db: AsyncSession) -> None:
+        """Signaler que la transaction courante modifie des données de référence."""
+        db.sync_session.info[REFERENCES_CHANGED_KEY] = True
+
+        if settings.REFERENCE_CACHE_SYNC:
+            result = await db.execute(
+                update(ReferenceVersion).where(ReferenceVersion.id == 1).values(version=ReferenceVersion.version + 1)
+            )
+            if result.rowcount == 0:
+                await db.execute(insert(ReferenceVersion).values(id=1, version=1))
+
+    async def _read_db_version(self, db: AsyncSession) -> int:
+        """Lire le compteur de version partagé entre les workers."""
+        result = await db.execute(select(ReferenceVersion.version).where(ReferenceVersion.id == 1))
+        return result.scalar_one_or_none() or 0
+
+    async def _load(self, db: AsyncSession) -> ReferenceSnapshot:
+        """Construire une nouvelle photographie depuis la base de données."""
+        generation = self._local_version
+
+        if settings.REFERENCE_CACHE_SYNC:
+            version = await self._read_db_version(db)
+            self._checked_at = time.monotonic()
+        else:
+            version = self._local_version
+
+        countries_result = await db.execute(select(Country).order_by(Country.id))
+        countries = {row.id: CountryInDB.model_validate(row) for row in countries_result.scalars()}
+
+        cities_result = await db.execute(select(City).order_by(City.id))
+        cities = {row.id: CityInDB.model_validate(row) for row in cities_result.scalars()}
+
+        currencies_result = await db.execute(select(Currency).order_by(Currency.id))
+        currencies = {row.id: CurrencyInDB.model_validate(row) for row in currencies_result.scalars()}
+
+        status_projects_result = await db.execute(select(StatusProject).order_by(StatusProject.id))
+        status_projects = {row.id: StatusProjectInDB.model_validate(row) for row in status_projects_result.scalars()}
+
+        cities_by_country: Dict[int, List[CityInDB]] = defaultdict(list)
+        for city in cities.values():
+            cities_by_country[city.country_id].append(city)
+
+        snapshot = ReferenceSnapshot(
+            version=version,
+            etag=_fingerprint(
+                countries=countries, cities=cities, currencies=currencies, status_projects=status_projects
+            ),
+            modified_at=datetime.now(timezone.utc),
+            countries=MappingProxyType(countries),
+            cities=MappingProxyType(cities),
+            currencies=MappingProxyType(currencies),
+            status_projects=MappingProxyType(status_projects),
+            countries_by_code=MappingProxyType({country.code: country for country in countries.values()}),
+            currencies_by_code=MappingProxyType({currency.code: currency for currency in currencies.values()}),
+            cities_by_country=MappingProxyType(
+                {country_id: tuple(country_cities) for country_id, country_cities in cities_by_country.items()}
+            ),
+        )
+        # Ne pas publier une photographie invalidée pendant son chargement
+        if generation == self._local_version:
+            self._snapshot = snapshot
+            self._loaded_at = time.monotonic()
+
+        logger.info(
+            f"Cache des données de référence chargé (version {version}): {len(countries)} pays, {len(cities)} villes, "
+            f"{len(currencies)} devises, {len(status_projects)} statuts"
+        )
+
+        return snapshot
+
+
+def _fingerprint(**indexes: Mapping[int, BaseModel]) -> str:
+    """`ETag` fort d'une photographie, calculé sur son contenu.
+
+    Deux workers qui ont chargé les mêmes données annoncent ainsi le même `ETag`, même si leurs compteurs de version
+    locaux diffèrent (synchronisation désactivée).
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for name, index in indexes.items():
+        digest.update(name.encode())
+        for item in index.values():
+            digest.update(item.model_dump_json().encode())
+    return f'"{digest.hexdigest()}"'
+
+
+# Instance unique du cache pour le processus
+reference_cache = ReferenceCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_reference_cache_after_commit(session: Session) -> None:
+    """Invalider le cache une fois validée une transaction ayant modifié les données de référence."""
+    if session.in_nested_transaction():
+        # Libération d'un savepoint : la transaction principale n'est pas encore validée
+        return
+    if session.info.pop(REFERENCES_CHANGED_KEY, False):
+        reference_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_reference_change_after_rollback(session: Session) -> None:
+    """Oublier les modifications annulées."""
+    if not session.in_nested_transaction():
+        session.info.pop(REFERENCES_CHANGED_KEY, None)
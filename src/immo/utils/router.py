@@ -1,15 +1,19 @@
 """Router pour les utilitaires."""
 
-from typing import List
+from typing import Callable, Hashable, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from pydantic import TypeAdapter
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from immo.extensions import get_db
+from immo.config import settings
+from immo.extensions import get_db, get_read_db
+from immo.http_cache import cache_headers, conditional_get
 from immo.users.models import User
 from immo.users.router import get_current_user
 from immo.utils.models import City, Country, Currency, StatusProject
+from immo.utils.references import ReferenceSnapshot, reference_cache
 from immo.utils.schemas import (
     CityCreate,
     CityInDB,
@@ -30,32 +34,54 @@ from immo.utils.schemas import (
 
 router = APIRouter()
 
+# Sérialiseurs JSON des listes de données de référence
+COUNTRIES_ADAPTER = TypeAdapter(List[CountryInDB])
+CITIES_ADAPTER = TypeAdapter(List[CityInDB])
+CURRENCIES_ADAPTER = TypeAdapter(List[CurrencyInDB])
+STATUS_PROJECTS_ADAPTER = TypeAdapter(List[StatusProjectInDB])
 
-@router.get("/properties", response_model=UtilsProperties)
-async def get_utils_properties(db: AsyncSession = Depends(get_db)):
-    """Récupérer toutes les propriétés utilitaires (pays, devises, statuts de projet)."""
-    # Récupérer les pays
-    countries_result = await db.execute(select(Country))
-    countries = countries_result.scalars().all()
 
-    # Récupérer les devises
-    currencies_result = await db.execute(select(Currency))
-    currencies = currencies_result.scalars().all()
+async def get_references(
+    request: Request, response: Response, db: AsyncSession = Depends(get_read_db)
+) -> ReferenceSnapshot:
+    """Photographie des données de référence, ou réponse `304 Not Modified` si la copie du client est à jour."""
+    references = await reference_cache.get(db)
+    conditional_get(request, response, references.etag, references.modified_at, settings.REFERENCE_CACHE_CONTROL)
+    return references
+
+
+def render(request: Request, references: ReferenceSnapshot, key: Hashable, build: Callable[[], bytes]) -> Response:
+    """Réponse JSON rendue et compressée une seule fois par version des données de référence."""
+    body = references.rendered(key, build)
+    return body.response(
+        request, cache_headers(references.etag, references.modified_at, settings.REFERENCE_CACHE_CONTROL)
+    )
 
-    # Récupérer les statuts de projet
-    status_projects_result = await db.execute(select(StatusProject))
-    status_projects = status_projects_result.scalars().all()
 
-    return {"countries": countries, "currencies": currencies, "status_projects": status_projects}
+@router.get("/properties", response_model=UtilsProperties)
+async def get_utils_properties(request: Request, references: ReferenceSnapshot = Depends(get_references)):
+    """Récupérer toutes les propriétés utilitaires (pays, devises, statuts de projet)."""
+    return render(
+        request,
+        references,
+        "properties",
+        lambda: UtilsProperties(
+            countries=list(references.countries.values()),
+            currencies=list(references.currencies.values()),
+            status_projects=list(references.status_projects.values()),
+        )
+        .model_dump_json()
+        .encode(),
+    )
 
 
 # Endpoints pour les pays
 @router.get("/countries", response_model=List[CountryInDB])
-async def get_countries(db: AsyncSession = Depends(get_db)):
+async def get_countries(request: Request, references: ReferenceSnapshot = Depends(get_references)):
     """Récupérer tous les pays."""
-    result = await db.execute(select(Country))
-    countries = result.scalars().all()
-    return countries
+    return render(
+        request, references, "countries", lambda: COUNTRIES_ADAPTER.dump_json(list(references.countries.values()))
+    )
 
 
 @router.post("/countries", response_model=CountryInDB, status_code=status.HTTP_201_CREATED)
@@ -76,6 +102,7 @@ async def create_country(
     # Créer le pays
     db_country = Country(name=country.name, code=country.code, created_by=current_user.id)
     db.add(db_country)
+    await reference_cache.mark_changed(db)
     await db.commit()
     await db.refresh(db_country)
 
@@ -83,15 +110,14 @@ async def create_country(
 
 
 @router.get("/countries/{country_id}", response_model=CountryInDB)
-async def get_country(country_id: int, db: AsyncSession = Depends(get_db)):
+async def get_country(country_id: int, request: Request, references: ReferenceSnapshot = Depends(get_references)):
     """Récupérer un pays par son ID."""
-    result = await db.execute(select(Country).where(Country.id == country_id))
-    country = result.scalar_one_or_none()
+    country = references.countries.get(country_id)
 
     if country is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pays non trouvé")
 
-    return country
+    return render(request, references, ("country", country_id), lambda: country.model_dump_json().encode())
 
 
 @router.put("/countries/{country_id}", response_model=CountryInDB)
@@ -119,6 +145,7 @@ async def update_country(
     db_country.name = country_update.name
     db_country.code = country_update.code
 
+    await reference_cache.mark_changed(db)
     await db.commit()
     await db.refresh(db_country)
 
@@ -145,6 +172,7 @@ async def delete_country(
 
     # Supprimer le pays
     await db.delete(db_country)
+    await reference_cache.mark_changed(db)
     await db.commit()
 
     return None
@@ -152,11 +180,15 @@ async def delete_country(
 
 # Endpoints pour les villes
 @router.get("/countries/{country_id}/cities", response_model=List[CityInDB])
-async def get_cities_by_country(country_id: int, db: AsyncSession = Depends(get_db)):
+async def get_cities_by_country(
+    country_id: int, request: Request, references: ReferenceSnapshot = Depends(get_references)
+):
     """Récupérer toutes les villes d'un pays."""
-    result = await db.execute(select(City).where(City.country_id == country_id))
-    cities = result.scalars().all()
-    return cities
+    if country_id not in references.countries:
+        # Pays inconnu : réponse vide, non mémorisée (un identifiant quelconque ne doit pas occuper la photographie)
+        return []
+    cities = list(references.cities_by_country.get(country_id, ()))
+    return render(request, references, ("country_cities", country_id), lambda: CITIES_ADAPTER.dump_json(cities))
 
 
 @router.post("/countries/{country_id}/cities", response_model=CityInDB, status_code=status.HTTP_201_CREATED)
@@ -186,6 +218,7 @@ async def create_city(
     # Créer la ville
     db_city = City(name=city.name, country_id=country_id, created_by=current_user.id)
     db.add(db_city)
+    await reference_cache.mark_changed(db)
     await db.commit()
     await db.refresh(db_city)
 
@@ -193,30 +226,27 @@ async def create_city(
 
 
 @router.get("/cities/{city_id}", response_model=CityWithCountry)
-async def get_city(city_id: int, db: AsyncSession = Depends(get_db)):
+async def get_city(city_id: int, request: Request, references: ReferenceSnapshot = Depends(get_references)):
     """Récupérer une ville par son ID avec les informations sur son pays."""
     # Récupérer la ville
-    result = await db.execute(select(City).where(City.id == city_id))
-    city = result.scalar_one_or_none()
+    city = references.cities.get(city_id)
 
     if city is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ville non trouvée")
 
     # Récupérer le pays
-    country_result = await db.execute(select(Country).where(Country.id == city.country_id))
-    country = country_result.scalar_one_or_none()
+    country = references.countries.get(city.country_id)
 
     if country is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pays non trouvé pour cette ville")
 
     # Construire la réponse
-    return {
-        "id": city.id,
-        "name": city.name,
-        "country_id": city.country_id,
-        "created_by": city.created_by,
-        "country": country,
-    }
+    return render(
+        request,
+        references,
+        ("city", city_id),
+        lambda: CityWithCountry(**city.model_dump(), country=country).model_dump_json().encode(),
+    )
 
 
 @router.put("/cities/{city_id}", response_model=CityInDB)
@@ -251,6 +281,7 @@ async def update_city(
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Pays non trouvé")
         db_city.country_id = city_update.country_id
 
+    await reference_cache.mark_changed(db)
     await db.commit()
     await db.refresh(db_city)
 
@@ -275,6 +306,7 @@ async def delete_city(city_id: int, db: AsyncSession = Depends(get_db), current_
 
     # Supprimer la ville
     await db.delete(db_city)
+    await reference_cache.mark_changed(db)
     await db.commit()
 
     return None
@@ -282,16 +314,18 @@ async def delete_city(city_id: int, db: AsyncSession = Depends(get_db), current_
 
 # Endpoints pour les devises
 @router.get("/currencies", response_model=List[CurrencyInDB])
-async def get_currencies(db: AsyncSession = Depends(get_db)):
+async def get_currencies(request: Request, references: ReferenceSnapshot = Depends(get_references)):
     """Récupérer toutes les devises."""
-    result = await db.execute(select(Currency))
-    currencies = result.scalars().all()
-    return currencies
+    return render(
+        request, references, "currencies", lambda: CURRENCIES_ADAPTER.dump_json(list(references.currencies.values()))
+    )
 
 
 @router.post("/currencies", response_model=CurrencyInDB, status_code=status.HTTP_201_CREATED)
 async def create_currency(
-    currency: CurrencyCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)
+    currency: CurrencyCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
 ):
     """Créer une nouvelle devise."""
     # Vérifier les permissions
@@ -311,6 +345,7 @@ async def create_currency(
     # Créer la devise
     db_currency = Currency(name=currency.name, code=currency.code, created_by=current_user.id)
     db.add(db_currency)
+    await reference_cache.mark_changed(db)
     await db.commit()
     await db.refresh(db_currency)
 
@@ -318,15 +353,14 @@ async def create_currency(
 
 
 @router.get("/currencies/{currency_id}", response_model=CurrencyInDB)
-async def get_currency(currency_id: int, db: AsyncSession = Depends(get_db)):
+async def get_currency(currency_id: int, request: Request, references: ReferenceSnapshot = Depends(get_references)):
     """Récupérer une devise par son ID."""
-    result = await db.execute(select(Currency).where(Currency.id == currency_id))
-    currency = result.scalar_one_or_none()
+    currency = references.currencies.get(currency_id)
 
     if currency is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Devise non trouvée")
 
-    return currency
+    return render(request, references, ("currency", currency_id), lambda: currency.model_dump_json().encode())
 
 
 @router.put("/currencies/{currency_id}", response_model=CurrencyInDB)
@@ -354,6 +388,7 @@ async def update_currency(
     db_currency.name = currency_update.name
     db_currency.code = currency_update.code
 
+    await reference_cache.mark_changed(db)
     await db.commit()
     await db.refresh(db_currency)
 
@@ -380,6 +415,7 @@ async def delete_currency(
 
     # Supprimer la devise
     await db.delete(db_currency)
+    await reference_cache.mark_changed(db)
     await db.commit()
 
     return None
@@ -387,11 +423,14 @@ async def delete_currency(
 
 # Endpoints pour les statuts de projet
 @router.get("/status-projects", response_model=List[StatusProjectInDB])
-async def get_status_projects(db: AsyncSession = Depends(get_db)):
+async def get_status_projects(request: Request, references: ReferenceSnapshot = Depends(get_references)):
     """Récupérer tous les statuts de projet."""
-    result = await db.execute(select(StatusProject))
-    status_projects = result.scalars().all()
-    return status_projects
+    return render(
+        request,
+        references,
+        "status_projects",
+        lambda: STATUS_PROJECTS_ADAPTER.dump_json(list(references.status_projects.values())),
+    )
 
 
 @router.post("/status-projects", response_model=StatusProjectInDB, status_code=status.HTTP_201_CREATED)
@@ -416,6 +455,7 @@ async def create_status_project(
     # Créer le statut de projet
     db_status_project = StatusProject(name=status_project.name, description=status_project.description)
     db.add(db_status_project)
+    await reference_cache.mark_changed(db)
     await db.commit()
     await db.refresh(db_status_project)
 
@@ -423,15 +463,18 @@ async def create_status_project(
 
 
 @router.get("/status-projects/{status_project_id}", response_model=StatusProjectInDB)
-async def get_status_project(status_project_id: int, db: AsyncSession = Depends(get_db)):
+async def get_status_project(
+    status_project_id: int, request: Request, references: ReferenceSnapshot = Depends(get_references)
+):
     """Récupérer un statut de projet par son ID."""
-    result = await db.execute(select(StatusProject).where(StatusProject.id == status_project_id))
-    status_project = result.scalar_one_or_none()
+    status_project = references.status_projects.get(status_project_id)
 
     if status_project is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Statut de projet non trouvé")
 
-    return status_project
+    return render(
+        request, references, ("status_project", status_project_id), lambda: status_project.model_dump_json().encode()
+    )
 
 
 @router.put("/status-projects/{status_project_id}", response_model=StatusProjectInDB)
@@ -465,6 +508,7 @@ async def update_status_project(
     db_status_project.name = status_project_update.name
     db_status_project.description = status_project_update.description
 
+    await reference_cache.mark_changed(db)
     await db.commit()
     await db.refresh(db_status_project)
 
@@ -497,6 +541,7 @@ async def delete_status_project(
 
     # Supprimer le statut de projet
     await db.delete(db_status_project)
+    await reference_cache.mark_changed(db)
     await db.commit()
 
     return None
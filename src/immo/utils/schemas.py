@@ -2,7 +2,7 @@
 
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 # Schémas pour les pays
@@ -31,8 +31,7 @@ class CountryInDB(CountryBase):
     id: int
     created_by: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Schémas pour les villes
@@ -62,8 +61,7 @@ class CityInDB(CityBase):
     id: int
     created_by: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CityWithCountry(CityInDB):
@@ -99,8 +97,7 @@ class CurrencyInDB(CurrencyBase):
     id: int
     created_by: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Schémas pour les statuts de projet
@@ -128,8 +125,7 @@ class StatusProjectInDB(StatusProjectBase):
 
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Schéma pour les propriétés utilitaires